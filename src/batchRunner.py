@@ -0,0 +1,195 @@
+"""Multiple simulation sweeps without the GUI.
+
+This module only depends on the simulator and pandas, so sweeps can run headless. Neither this module nor
+the simulator imports matplotlib (TrafficSimulation only loads it in its animation methods), so workers
+started with spawn or forkserver never load it. Forked workers inherit whatever the parent process
+already had loaded.
+"""
+import os
+import importlib.util
+import random
+import multiprocessing
+import numpy as np
+import pandas as pd
+from vehicle import DriverType
+import kernels
+
+# Excel writer settings: xlsxwriter is much faster than openpyxl, which is kept as the fallback when
+# xlsxwriter is not installed. (Its constant_memory mode cannot be used: pandas writes column by column,
+# and that mode drops the cells of rows it has already flushed.)
+if importlib.util.find_spec('xlsxwriter') is not None:
+    EXCEL_WRITER_OPTIONS = {'engine': 'xlsxwriter'}
+else:
+    EXCEL_WRITER_OPTIONS = {'engine': 'openpyxl'}
+
+# Settings shared by every job of a sweep, set once per worker process by init_worker
+_worker_settings = None
+
+def init_worker(simulation_params, deployments, steps):
+    """Store the settings shared by all jobs in the worker, so each job only carries its own values."""
+    global _worker_settings
+    _worker_settings = (simulation_params, deployments, steps)
+
+def run_simulation_job(job):
+    """Run one simulation of a sweep (in a worker process) and return its average speed.
+    
+    Args:
+        job: Tuple of (number of vehicles, random seed)
+    """
+    from trafficSimulation import TrafficSimulation
+    
+    vehicle_count, seed = job
+    simulation_params, deployments, steps = _worker_settings
+    # Forked workers would otherwise all continue from the same random state (the global one is only used
+    # by the Vehicle update when the compiled kernel is not available)
+    random.seed(seed)
+    simulation = TrafficSimulation(**simulation_params, n_vehicles=vehicle_count, seed=seed)
+    simulation.set_scheduled_vehicles(deployments)
+    return simulation.run_without_animation(steps=steps)
+
+def run_simulations(simulation_params, vehicle_counts, num_simulations, deployments, steps_per_simulation=800):
+    """Run num_simulations simulations for each vehicle count and return the detailed results.
+    
+    Args:
+        simulation_params: TrafficSimulation keyword arguments shared by all runs (n_vehicles is overridden)
+        vehicle_counts: Number of vehicles of each group of runs
+        num_simulations: Number of runs per vehicle count
+        deployments: Deployment schedule (DEPLOYMENT_DTYPE array) used by every run
+        steps_per_simulation: Number of steps of each run
+    
+    Returns:
+        DataFrame with one row per run
+    """
+    # Per-run columns, preallocated and filled by job index (the other columns are the same for every run)
+    num_runs = len(vehicle_counts) * num_simulations
+    simulation_numbers = np.empty(num_runs, dtype=np.int64)
+    run_vehicle_counts = np.empty(num_runs, dtype=np.int64)
+    avg_speed_results = np.empty(num_runs, dtype=np.float64)
+    
+    # Calculate density of every vehicle count: vehicles / (road length * lanes)
+    count_densities = np.asarray(vehicle_counts, dtype=np.float64) / (simulation_params['road_length'] * 
+                                                                      simulation_params['lanes_count'])
+    
+    # The simulations are independent, so they are spread over all CPU cores. Each job gets its own
+    # seed, drawn here so a seeded run stays reproducible
+    jobs = [
+        (vehicle_count, random.randrange(2**32))
+        for vehicle_count in vehicle_counts
+        for sim_num in range(num_simulations)
+    ]
+    
+    # The parameters and the deployment schedule are sent to each worker once, not with every job
+    worker_params = dict(simulation_params, to_print=False)
+    worker_params.pop('n_vehicles', None)
+    # Compile the simulation kernel once here rather than in every worker
+    if kernels.NUMBA_AVAILABLE:
+        kernels.warm_up()
+    
+    with multiprocessing.Pool(processes=os.cpu_count(), initializer=init_worker,
+                              initargs=(worker_params, deployments, steps_per_simulation)) as pool:
+        # Results come back in job order: all runs of the first vehicle count, then the next, ...
+        avg_speeds = pool.imap(run_simulation_job, jobs, chunksize=max(1, len(jobs) // (4 * os.cpu_count())))
+        
+        k = 0
+        for vehicle_count, density in zip(vehicle_counts, count_densities.tolist()):
+            print(f"\nRunning simulations with {vehicle_count} vehicles...")
+            
+            for sim_num in range(num_simulations):
+                print(f"  Simulation {sim_num + 1}/{num_simulations}...")
+                avg_speed = next(avg_speeds)
+                
+                # Store result
+                simulation_numbers[k] = sim_num + 1
+                run_vehicle_counts[k] = vehicle_count
+                avg_speed_results[k] = avg_speed
+                k += 1
+                
+                print(f"    Average speed: {avg_speed:.2f} m/s")
+                print(f"    Density: {density:.4f} vehicles/m")
+                print(f"    Flow: {density * avg_speed:.4f} vehicles/s")
+    
+    densities = np.repeat(count_densities, num_simulations)
+    driver_distribution = simulation_params['driver_distribution']
+    return pd.DataFrame({
+        'Simulation Number': simulation_numbers,
+        'Number of Vehicles': run_vehicle_counts,
+        'Number of Lanes': simulation_params['lanes_count'],
+        'Road Length': simulation_params['road_length'],
+        'Simulation Time (s)': simulation_params['simulation_time'],
+        'Time Step (s)': simulation_params['dt'],
+        'Animation Interval (ms)': simulation_params['animation_interval'],
+        'Percentage of Distracted Vehicles': simulation_params['distracted_percentage'],
+        'Aggressive %': driver_distribution[DriverType.AGGRESSIVE] * 100,
+        'Normal %': driver_distribution[DriverType.NORMAL] * 100,
+        'Cautious %': driver_distribution[DriverType.CAUTIOUS] * 100,
+        'Polite %': driver_distribution[DriverType.POLITE] * 100,
+        'Submissive %': driver_distribution[DriverType.SUBMISSIVE] * 100,
+        'Average Speed': avg_speed_results,
+        'Density': densities,
+        # Flow: density * average speed
+        'Flow': densities * avg_speed_results
+    })
+
+def summarize_results(df_detailed):
+    """Aggregate the detailed results per vehicle count.
+    
+    The runs of a sweep share every setting but the vehicle count, so the runs are sorted by vehicle count
+    once and each statistic is a NumPy reduction over the resulting contiguous groups.
+    """
+    vehicle_counts = df_detailed['Number of Vehicles'].to_numpy()
+    order = np.argsort(vehicle_counts, kind='stable')
+    group_vehicle_counts, group_starts, group_sizes = np.unique(vehicle_counts[order], return_index=True, 
+                                                                return_counts=True)
+    # Settings that are the same for every run of a group are taken from its first run
+    first_runs = df_detailed.iloc[order[group_starts]]
+    
+    def group_statistics(column):
+        """Mean, sample variance, minimum and maximum of a column for each group."""
+        values = df_detailed[column].to_numpy(dtype=np.float64)[order]
+        means = np.add.reduceat(values, group_starts) / group_sizes
+        squared_deviations = (values - np.repeat(means, group_sizes)) ** 2
+        with np.errstate(divide='ignore', invalid='ignore'):
+            variances = np.add.reduceat(squared_deviations, group_starts) / (group_sizes - 1)
+        variances[group_sizes < 2] = np.nan  # Undefined for a single run, as with pandas
+        return means, variances, np.minimum.reduceat(values, group_starts), np.maximum.reduceat(values, group_starts)
+    
+    speed_mean, speed_variance, speed_min, speed_max = group_statistics('Average Speed')
+    flow_mean, flow_variance, flow_min, flow_max = group_statistics('Flow')
+    
+    return pd.DataFrame({
+        'Number of Vehicles': group_vehicle_counts,
+        'Number of Lanes': first_runs['Number of Lanes'].to_numpy(),
+        'Road Length': first_runs['Road Length'].to_numpy(),
+        'Percentage of Distracted Vehicles': first_runs['Percentage of Distracted Vehicles'].to_numpy(),
+        'Average Speed': speed_mean,
+        'Minimum Average Speed': speed_min,
+        'Maximum Average Speed': speed_max,
+        'Density': first_runs['Density'].to_numpy(),
+        'Average Flow': flow_mean,
+        'Minimum Flow': flow_min,
+        'Maximum Flow': flow_max,
+        'Simulation Time (s)': first_runs['Simulation Time (s)'].to_numpy(),
+        'Time Step (s)': first_runs['Time Step (s)'].to_numpy(),
+        'Animation Interval (ms)': first_runs['Animation Interval (ms)'].to_numpy(),
+        'Aggressive %': first_runs['Aggressive %'].to_numpy(),
+        'Normal %': first_runs['Normal %'].to_numpy(),
+        'Cautious %': first_runs['Cautious %'].to_numpy(),
+        'Polite %': first_runs['Polite %'].to_numpy(),
+        'Submissive %': first_runs['Submissive %'].to_numpy(),
+        # Apply the requested modifications to variance and standard deviation
+        'Variance of Average Speed': speed_variance / 4,
+        'Standard Deviation of Average Speed': np.sqrt(speed_variance) / 4,
+        'Standard Deviation of Flow': np.sqrt(flow_variance) / 2,
+    })
+
+def save_results(df_detailed, df_summary, folder_name):
+    """Save the detailed and summary results to two sheets of one Excel file and return its path."""
+    # Save both dataframes to different sheets in the same Excel file
+    excel_filename = os.path.join(folder_name, f'simulation_results.xlsx')
+    
+    # Use ExcelWriter to save multiple sheets to the same file
+    with pd.ExcelWriter(excel_filename, **EXCEL_WRITER_OPTIONS) as writer:
+        df_detailed.to_excel(writer, sheet_name='Detailed Results', index=False)
+        df_summary.to_excel(writer, sheet_name='Summary Results', index=False)
+    
+    return excel_filename
@@ -0,0 +1,373 @@
+"""Compiled per-step vehicle update (IDM car following + MOBIL lane changes) over NumPy arrays.
+
+The kernel reproduces Vehicle.update for every vehicle of a step, in list order, so a vehicle sees the
+already updated state of the vehicles before it (exactly like the object path in TrafficSimulation.run_step).
+numba is optional: without it NUMBA_AVAILABLE is False and the simulation keeps using the Vehicle objects.
+"""
+import math
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """Stand-in for numba.njit that leaves the function as plain Python."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda function: function
+
+# Columns of the per-vehicle parameter table (constant while a vehicle is on the road)
+P_LENGTH = 0
+P_DESIRED_VELOCITY = 1
+P_TIME_HEADWAY = 2
+P_MIN_GAP = 3
+P_MAX_ACCELERATION = 4
+P_COMFORTABLE_DECELERATION = 5
+P_DELTA = 6
+P_POLITENESS = 7
+P_CHANGING_THRESHOLD = 8
+P_SAFE_DECELERATION = 9
+P_RIGHT_BIAS = 10
+P_OBSTACLE_START_TIME = 11
+P_OBSTACLE_END_TIME = 12
+P_DISTRACTION_CHECK_INTERVAL = 13
+P_DISTRACTION_PROBABILITY = 14
+NUM_PARAMS = 15
+
+# Columns of the per-step random draws (uniform in [0, 1))
+R_DISTRACTION = 0  # Whether a distraction starts
+R_DISTRACTION_DURATION = 1  # Its duration (3-5 s)
+R_LANE_CHANGE = 2  # Whether a lane change is considered
+NUM_RANDOM_DRAWS = 3
+
+# Road length the MOBIL helpers of Vehicle use for their IDM calls (they rely on the idm_acceleration default)
+MOBIL_ROAD_LENGTH = 1000.0
+
+# Neighbour search through a cell list from this many vehicles on (below it, scanning every vehicle is faster)
+CELL_LIST_MIN_VEHICLES = 128
+MIN_CELL_SIZE = 10.0  # Cells are at least as long as the minimum spacing between vehicles (m)
+
+
+def cell_count(n_vehicles, lanes_count, road_length):
+    """Number of cells per lane to pass to step_vehicles: about one vehicle per cell, or 0 for no cell list."""
+    if n_vehicles < CELL_LIST_MIN_VEHICLES:
+        return 0
+    return max(1, min(n_vehicles // lanes_count, int(road_length / MIN_CELL_SIZE)))
+
+
+@njit(cache=True)
+def idm_acceleration(i, lead, position, velocity, params, is_obstacle, road_length):
+    """IDM acceleration of vehicle i behind vehicle lead (-1 for a free road), as Vehicle.idm_acceleration."""
+    if is_obstacle[i]:
+        return 0.0
+
+    max_acceleration = params[i, P_MAX_ACCELERATION]
+    a_free = max_acceleration * (1 - (velocity[i] / params[i, P_DESIRED_VELOCITY]) ** params[i, P_DELTA])
+    if lead < 0:
+        return a_free
+
+    # Gap to the leader, wrapped around the circular road
+    gap = position[lead] - position[i] - params[lead, P_LENGTH]
+    if gap < 0:
+        gap += road_length
+
+    delta_v = velocity[i] - velocity[lead]
+    s_star = params[i, P_MIN_GAP] + max(0.0, velocity[i] * params[i, P_TIME_HEADWAY] +
+                                        (velocity[i] * delta_v) /
+                                        (2 * math.sqrt(max_acceleration * params[i, P_COMFORTABLE_DECELERATION])))
+    a_int = -max_acceleration * (s_star / max(gap, 0.1)) ** 2
+    return a_free + a_int
+
+
+@njit(cache=True)
+def find_neighbors(i, target_lane, position, lane, is_active, road_length):
+    """Indices of the leading and following vehicles of vehicle i in target_lane (-1 if none)."""
+    lead = -1
+    min_lead_distance = np.inf
+    follow = -1
+    min_follow_distance = np.inf
+
+    for j in range(position.shape[0]):
+        if j == i or lane[j] != target_lane or not is_active[j]:
+            continue
+
+        # Distance accounting for the circular road
+        distance = position[j] - position[i]
+        if distance > road_length / 2:
+            distance -= road_length
+        elif distance < -road_length / 2:
+            distance += road_length
+
+        if distance > 0 and distance < min_lead_distance:
+            min_lead_distance = distance
+            lead = j
+        if distance < 0 and -distance < min_follow_distance:
+            min_follow_distance = -distance
+            follow = j
+
+    return lead, follow
+
+
+@njit(cache=True)
+def cell_index(position, cell_size, n_cells):
+    """Cell of a position along the road (a position at the very end of the road is in the last cell)."""
+    cell = int(position / cell_size)
+    if cell < 0:
+        return 0
+    if cell >= n_cells:
+        return n_cells - 1
+    return cell
+
+
+@njit(cache=True)
+def cell_insert(i, vehicle_lane, cell, head, next_in_cell, prev_in_cell):
+    """Add vehicle i at the front of the chain of its cell."""
+    first = head[vehicle_lane, cell]
+    next_in_cell[i] = first
+    prev_in_cell[i] = -1
+    if first >= 0:
+        prev_in_cell[first] = i
+    head[vehicle_lane, cell] = i
+
+
+@njit(cache=True)
+def cell_remove(i, vehicle_lane, cell, head, next_in_cell, prev_in_cell):
+    """Unlink vehicle i from the chain of its cell."""
+    if prev_in_cell[i] >= 0:
+        next_in_cell[prev_in_cell[i]] = next_in_cell[i]
+    else:
+        head[vehicle_lane, cell] = next_in_cell[i]
+    if next_in_cell[i] >= 0:
+        prev_in_cell[next_in_cell[i]] = prev_in_cell[i]
+
+
+@njit(cache=True)
+def find_neighbors_in_cells(i, target_lane, position, is_active, road_length, head, next_in_cell, cell_size):
+    """Same result as find_neighbors, searching the cell list outwards from the cell of vehicle i.
+
+    Rings of cells at growing distance are searched until no vehicle further away can be closer than the
+    neighbours already found. Ties go to the lowest index, as in the scan over all vehicles.
+    """
+    n_cells = head.shape[1]
+    lead = -1
+    min_lead_distance = np.inf
+    follow = -1
+    min_follow_distance = np.inf
+    center = cell_index(position[i], cell_size, n_cells)
+
+    for ring in range(n_cells // 2 + 1):
+        # Vehicles in this ring are at least (ring - 1) cells away; one more ring of slack covers rounding
+        if (ring - 2) * cell_size > max(min_lead_distance, min_follow_distance):
+            break
+        for side in range(2):
+            if side == 1 and (ring == 0 or 2 * ring == n_cells):
+                continue  # Same cell as on side 0
+            if side == 0:
+                cell = (center + ring) % n_cells
+            else:
+                cell = (center - ring + n_cells) % n_cells
+
+            j = head[target_lane, cell]
+            while j >= 0:
+                if j != i and is_active[j]:
+                    # Distance accounting for the circular road
+                    distance = position[j] - position[i]
+                    if distance > road_length / 2:
+                        distance -= road_length
+                    elif distance < -road_length / 2:
+                        distance += road_length
+
+                    if distance > 0 and (distance < min_lead_distance or
+                                         (distance == min_lead_distance and j < lead)):
+                        min_lead_distance = distance
+                        lead = j
+                    if distance < 0 and (-distance < min_follow_distance or
+                                         (-distance == min_follow_distance and j < follow)):
+                        min_follow_distance = -distance
+                        follow = j
+                j = next_in_cell[j]
+
+    return lead, follow
+
+
+@njit(cache=True)
+def neighbors(i, target_lane, position, lane, is_active, road_length, head, next_in_cell, cell_size):
+    """Leading and following vehicles of vehicle i in target_lane, through the cell list if there is one."""
+    if head.shape[1] > 0:
+        return find_neighbors_in_cells(i, target_lane, position, is_active, road_length, head, next_in_cell,
+                                       cell_size)
+    return find_neighbors(i, target_lane, position, lane, is_active, road_length)
+
+
+@njit(cache=True)
+def mobil_decide_lane_change(i, lanes_count, road_length, position, velocity, lane, acceleration,
+                             is_active, params, is_obstacle, head, next_in_cell, cell_size):
+    """Lane chosen by vehicle i with the MOBIL model, as Vehicle.mobil_decide_lane_change."""
+    current_lane = lane[i]
+    current_acc = acceleration[i]
+    lead_current, follow_current = neighbors(i, current_lane, position, lane, is_active, road_length,
+                                             head, next_in_cell, cell_size)
+
+    best_lane = current_lane
+    max_advantage = 0.0
+
+    for target_lane in (current_lane - 1, current_lane + 1):
+        if target_lane < 0 or target_lane >= lanes_count:
+            continue
+        lead_target, follow_target = neighbors(i, target_lane, position, lane, is_active, road_length,
+                                               head, next_in_cell, cell_size)
+
+        # Safety criterion: enough room behind the new leader, and the new follower does not brake too hard
+        if lead_target >= 0:
+            gap = position[lead_target] - position[i] - params[lead_target, P_LENGTH]
+            if gap < 0:
+                gap += road_length
+            if gap < params[i, P_MIN_GAP]:
+                continue
+        if follow_target >= 0:
+            new_follower_acc = idm_acceleration(follow_target, i, position, velocity, params, is_obstacle,
+                                                MOBIL_ROAD_LENGTH)
+            if new_follower_acc < -params[i, P_SAFE_DECELERATION]:
+                continue
+
+        # Advantage of the lane change (a vehicle in the target lane behaves as i itself)
+        new_acc = idm_acceleration(i, lead_target, position, velocity, params, is_obstacle, MOBIL_ROAD_LENGTH)
+        acc_gain = new_acc - current_acc
+
+        disadvantage_follower = 0.0
+        if follow_target >= 0:
+            old_follower_acc = idm_acceleration(follow_target, lead_target, position, velocity, params,
+                                                is_obstacle, MOBIL_ROAD_LENGTH)
+            new_follower_acc = idm_acceleration(follow_target, i, position, velocity, params,
+                                                is_obstacle, MOBIL_ROAD_LENGTH)
+            disadvantage_follower = old_follower_acc - new_follower_acc
+
+        disadvantage_old_follower = 0.0
+        if follow_current >= 0:
+            old_acc = idm_acceleration(follow_current, i, position, velocity, params,
+                                       is_obstacle, MOBIL_ROAD_LENGTH)
+            new_acc = idm_acceleration(follow_current, lead_current, position, velocity, params,
+                                       is_obstacle, MOBIL_ROAD_LENGTH)
+            disadvantage_old_follower = max(old_acc - new_acc, 0.0)
+
+        advantage = acc_gain - params[i, P_POLITENESS] * (disadvantage_follower + disadvantage_old_follower)
+
+        # Right-lane bias
+        if target_lane > current_lane:
+            advantage += params[i, P_RIGHT_BIAS]
+
+        if advantage > max_advantage and advantage > params[i, P_CHANGING_THRESHOLD]:
+            max_advantage = advantage
+            best_lane = target_lane
+
+    return best_lane
+
+
+@njit(cache=True)
+def step_vehicles(dt, current_time, road_length, lanes_count, change_lanes,
+                  position, velocity, lane, acceleration, is_active, is_distracted,
+                  distraction_start_time, distraction_duration, last_distraction_check,
+                  params, is_obstacle, can_be_distracted, random_draws, n_cells):
+    """Update every vehicle in place for one time step and return the number of lane changes.
+
+    Args:
+        dt, current_time, road_length, lanes_count, change_lanes: As passed to Vehicle.update
+        position ... last_distraction_check: Per-vehicle state arrays, updated in place
+        params: Per-vehicle parameter table (columns P_*)
+        is_obstacle, can_be_distracted: Per-vehicle flags
+        random_draws: Uniform draws of shape (n_vehicles, NUM_RANDOM_DRAWS)
+        n_cells: Cells per lane of the cell list for the neighbour search (0 to scan every vehicle instead,
+            see cell_count)
+    """
+    n = position.shape[0]
+    lane_changes = 0
+
+    # Cell list of the vehicles: head[lane, cell] is the first vehicle of each cell, chained through
+    # next_in_cell/prev_in_cell. A vehicle moves to its new cell right after its update
+    cell_size = road_length / max(n_cells, 1)
+    head = np.full((lanes_count, n_cells), -1, dtype=np.int64)
+    next_in_cell = np.full(n, -1, dtype=np.int64)
+    prev_in_cell = np.full(n, -1, dtype=np.int64)
+    vehicle_cell = np.zeros(n, dtype=np.int64)
+    if n_cells > 0:
+        for i in range(n):
+            vehicle_cell[i] = cell_index(position[i], cell_size, n_cells)
+            cell_insert(i, lane[i], vehicle_cell[i], head, next_in_cell, prev_in_cell)
+
+    for i in range(n):
+        # Obstacles are only active within their time window and never move
+        if is_obstacle[i]:
+            is_active[i] = (current_time >= params[i, P_OBSTACLE_START_TIME] and
+                            current_time < params[i, P_OBSTACLE_END_TIME])
+            if is_active[i]:
+                acceleration[i] = 0.0
+            continue
+
+        # Start or end a distraction
+        if can_be_distracted[i]:
+            if is_distracted[i]:
+                if current_time >= distraction_start_time[i] + distraction_duration[i]:
+                    is_distracted[i] = False
+            elif current_time - last_distraction_check[i] >= params[i, P_DISTRACTION_CHECK_INTERVAL]:
+                last_distraction_check[i] = current_time
+                if random_draws[i, R_DISTRACTION] < params[i, P_DISTRACTION_PROBABILITY]:
+                    is_distracted[i] = True
+                    distraction_start_time[i] = current_time
+                    distraction_duration[i] = 3.0 + 2.0 * random_draws[i, R_DISTRACTION_DURATION]
+
+        lead, _ = neighbors(i, lane[i], position, lane, is_active, road_length, head, next_in_cell, cell_size)
+        acceleration[i] = idm_acceleration(i, lead, position, velocity, params, is_obstacle, road_length)
+
+        if not is_distracted[i]:
+            velocity[i] = max(0.0, min(velocity[i] + acceleration[i] * dt, 2 * params[i, P_DESIRED_VELOCITY]))
+        elif lead >= 0:
+            # Distracted drivers keep their speed, but still brake hard when too close to the vehicle ahead
+            gap = position[lead] - position[i] - params[lead, P_LENGTH]
+            if gap < 0:
+                gap += road_length
+            if gap < params[i, P_MIN_GAP] + velocity[i] * 1.0:
+                deceleration = min(params[i, P_COMFORTABLE_DECELERATION] * 1.5, velocity[i] / dt)
+                velocity[i] -= deceleration * dt
+
+        position[i] += velocity[i] * dt
+        if position[i] > road_length:
+            position[i] -= road_length
+
+        # Consider a lane change occasionally (not while distracted)
+        old_lane = lane[i]
+        if change_lanes and not is_distracted[i] and random_draws[i, R_LANE_CHANGE] < 0.1:
+            new_lane = mobil_decide_lane_change(i, lanes_count, road_length, position, velocity, lane,
+                                                acceleration, is_active, params, is_obstacle,
+                                                head, next_in_cell, cell_size)
+            if new_lane != lane[i]:
+                lane[i] = new_lane
+                lane_changes += 1
+
+        # Keep the cell list up to date for the vehicles updated after this one
+        if n_cells > 0:
+            new_cell = cell_index(position[i], cell_size, n_cells)
+            if new_cell != vehicle_cell[i] or lane[i] != old_lane:
+                cell_remove(i, old_lane, vehicle_cell[i], head, next_in_cell, prev_in_cell)
+                cell_insert(i, lane[i], new_cell, head, next_in_cell, prev_in_cell)
+                vehicle_cell[i] = new_cell
+
+    return lane_changes
+
+
+def warm_up():
+    """Compile the kernels (or load them from numba's on-disk cache) by running them on a tiny input.
+
+    Called before starting worker processes: forked workers inherit the compiled code, and spawned ones
+    find it in the cache instead of all compiling it at the same time.
+    """
+    n = 2
+    params = np.zeros((n, NUM_PARAMS))
+    params[:, P_DESIRED_VELOCITY] = 1.0
+    step_vehicles(0.5, 0.0, 1000.0, 1, True,
+                  np.zeros(n), np.zeros(n), np.zeros(n, dtype=np.int64), np.zeros(n),
+                  np.ones(n, dtype=np.bool_), np.zeros(n, dtype=np.bool_),
+                  np.zeros(n), np.zeros(n), np.zeros(n),
+                  params, np.ones(n, dtype=np.bool_), np.zeros(n, dtype=np.bool_), np.zeros((n, NUM_RANDOM_DRAWS)), 0)
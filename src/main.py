@@ -2,7 +2,6 @@ import argparse
 import sys
 import numpy as np
 from vehicle import DriverType
-from simulationGUI import SimulationGUI
 
 def add_command_line_features(SimulationGUI):
     """
@@ -156,15 +155,14 @@ def add_command_line_features(SimulationGUI):
             # Check if required vehicle parameters are provided
             required_vehicle_args = ['vehicle_type', 'vehicle_lane', 'vehicle_position', 'vehicle_velocity']
             if all(hasattr(args, arg) and getattr(args, arg) is not None for arg in required_vehicle_args):
-                vehicle_info = {
-                    'driver_type': driver_type_map.get(args.vehicle_type, DriverType.NORMAL),
-                    'lane': max(0, min(self.params['lanes_count'] - 1, args.vehicle_lane - 1)),  # Convert to 0-based and bound
-                    'desired_velocity': args.vehicle_velocity if args.vehicle_type != 'obstacle' else 0,
-                    'deployment_time': args.vehicle_deploy_time if args.vehicle_deploy_time is not None else 0,
-                    'initial_position': args.vehicle_position,
-                    'is_distracted': args.vehicle_distracted,
-                }
-                self.vehicle_deployments.append(vehicle_info)
+                self.add_deployment(
+                    driver_type=driver_type_map.get(args.vehicle_type, DriverType.NORMAL),
+                    lane=max(0, min(self.params['lanes_count'] - 1, args.vehicle_lane - 1)),  # Convert to 0-based and bound
+                    desired_velocity=args.vehicle_velocity if args.vehicle_type != 'obstacle' else 0,
+                    deployment_time=args.vehicle_deploy_time if args.vehicle_deploy_time is not None else 0,
+                    initial_position=args.vehicle_position,
+                    is_distracted=args.vehicle_distracted,
+                )
             else:
                 print("Warning: Incomplete vehicle parameters, manual vehicle not added")
     
@@ -203,10 +201,13 @@ def add_command_line_features(SimulationGUI):
     
     return SimulationGUI
 
-# Extend the SimulationGUI class with command line features
-ModifiedSimulationGUI = add_command_line_features(SimulationGUI)
-
 # Create and run the GUI/simulation
 if __name__ == "__main__":
+    # Imported here rather than at module level: with the spawn start method every batch worker re-imports
+    # this module, and the GUI (and matplotlib) should not be loaded there
+    from simulationGUI import SimulationGUI
+    
+    # Extend the SimulationGUI class with command line features
+    ModifiedSimulationGUI = add_command_line_features(SimulationGUI)
     gui = ModifiedSimulationGUI()
     gui.setup_start_screen()  # This will only run if not in command line mode
\ No newline at end of file
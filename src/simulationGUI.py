@@ -1,17 +1,60 @@
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib import gridspec
-import matplotlib.animation as animation
-from matplotlib.patches import Rectangle, Polygon, Circle
-from matplotlib.widgets import Button, Slider, TextBox, RadioButtons, CheckButtons
-import random
-from collections import defaultdict
-from enum import Enum
+from matplotlib.patches import Rectangle
+from matplotlib.widgets import AxesWidget, Button, TextBox, RadioButtons, CheckButtons
+from matplotlib.transforms import Bbox
 import pandas as pd
-from vehicle import Vehicle, DriverType
-from trafficSimulation import TrafficSimulation
+from vehicle import DriverType, DEPLOYMENT_DTYPE
 import os
-from tkinter import Tk, filedialog
+import queue
+import threading
+import traceback
+
+# Driver type radio button labels, and the reverse lookup keyed by DriverType.value (as stored in deployments)
+_DRIVER_TYPE_MAP = {
+    'Aggressive': DriverType.AGGRESSIVE,
+    'Normal': DriverType.NORMAL,
+    'Cautious': DriverType.CAUTIOUS,
+    'Polite': DriverType.POLITE,
+    'Submissive': DriverType.SUBMISSIVE,
+    'Obstacle': DriverType.OBSTACLE
+}
+_DRIVER_TYPE_LABEL = {driver_type.value: label for label, driver_type in _DRIVER_TYPE_MAP.items()}
+
+# Order of the values in the driver distribution text box
+_DISTRIBUTION_DRIVER_TYPES = (DriverType.AGGRESSIVE, DriverType.NORMAL, DriverType.CAUTIOUS,
+                              DriverType.POLITE, DriverType.SUBMISSIVE)
+
+# Deployment list layout: each row is one monospace string with fixed-width columns, and only the
+# last _VEHICLE_LIST_ROWS entries are shown
+_VEHICLE_LIST_ROW_FORMAT = "{:>3} {:<10} {:>4} {:>6} {:>5} {:>6} {:<10}"
+_VEHICLE_LIST_HEADER = _VEHICLE_LIST_ROW_FORMAT.format("#", "Type", "Lane", "Pos", "Speed", "Deploy", "Distracted")
+_VEHICLE_LIST_ROWS = 15
+
+def _parse_count(text):
+    """Parse an integer parameter, also accepting values typed as floats (e.g. '30.0')."""
+    return int(float(text))
+
+# Parser of each parameter text box, shared by every SimulationGUI instead of fresh lambdas per setup
+_PARAM_PARSERS = {
+    'road_length': float,
+    'lanes_count': _parse_count,
+    'n_vehicles': _parse_count,
+    'simulation_time': float,
+    'dt': float,
+    'animation_interval': float,
+    'distracted_percentage': float,
+}
+
+def _panel_bbox(fig, ax, renderer):
+    """Bounding box (in inches, with a small margin) of an axes and its decorations, for savefig."""
+    return ax.get_tightbbox(renderer).transformed(fig.dpi_scale_trans.inverted()).padded(0.1)
+
+def _set_text(textbox, text):
+    """Set the text of a TextBox, skipping set_val (its submit callbacks and redraw) when it is unchanged."""
+    if textbox.text != text:
+        textbox.set_val(text)
 
 class SimulationGUI:
     def __init__(self):
@@ -35,8 +78,11 @@ class SimulationGUI:
         self.simulation = None
         self.fig = None
         
-        # Vehicle deployment list
-        self.vehicle_deployments = []
+        # Vehicle deployment list (structured array, grown by doubling; only the first num_deployments rows are used)
+        self.vehicle_deployments = np.empty(16, dtype=DEPLOYMENT_DTYPE)
+        self.num_deployments = 0
+        self.deployments_version = 0  # Incremented on every change to the deployment list
+        self.displayed_deployments_version = -1  # Version currently shown in the list panel
         self.current_driver_type = DriverType.NORMAL
         self.current_lane = 0
         self.current_desired_velocity = 25  # m/s
@@ -54,6 +100,13 @@ class SimulationGUI:
         self.num_simulations = 20  # Default number of simulations to run
         self.num_vehicles_array = [10, 15, 20, 25, 30, 35, 40, 45, 50, 55, 60]  # Default array of vehicle counts
         self.num_vehicles_array.reverse()  # Reverse the order for better visualization
+        
+        # Parameter text boxes and their last parsed texts, filled by setup_start_screen (empty when run from
+        # the command line, so update_params has nothing to read)
+        self.param_textboxes = {}
+        self.param_texts = {}
+        self.updating_params = False  # Set while update_params runs (its set_val calls re-enter it)
+        self.driver_dist_text = None  # Last driver distribution text parsed successfully
 
         
     def setup_start_screen(self):
@@ -61,7 +114,9 @@ class SimulationGUI:
         self.fig = plt.figure(figsize=(15, 10))
         
         # Define subplot grid with better spacing - changed to 2x3 layout
-        gs = gridspec.GridSpec(2, 3, height_ratios=[3, 1], width_ratios=[1, 1, 1], hspace=0.3, wspace=0.3)
+        # (margins are fixed here since the widget axes are placed by hand and tight_layout cannot handle them)
+        gs = gridspec.GridSpec(2, 3, height_ratios=[3, 1], width_ratios=[1, 1, 1], hspace=0.3, wspace=0.3,
+                               left=0.125, right=0.9, bottom=0.11, top=0.88)
         
         # Main parameter area
         ax_params = plt.subplot(gs[0, 0])
@@ -140,6 +195,7 @@ class SimulationGUI:
 
         # Driver type distribution
         default_dist = self.create_distribution_string()
+        self.driver_dist_text = default_dist  # Matches self.params, no need to parse it
         self.textbox_driver_dist = TextBox(ax_driver_dist, '', initial=default_dist)
         self.textbox_driver_dist.on_submit(self.update_driver_distribution)
         
@@ -194,7 +250,13 @@ class SimulationGUI:
         
         # ==== Vehicle List Section (moved to right side) ====
         self.ax_vehicle_list = ax_vehicle_list
-        self.update_vehicle_list_display()
+        self.create_vehicle_list_artists()
+        
+        # List changes are shown at most once per frame (~60 Hz), however fast vehicles are added
+        self.vehicle_list_redraw_pending = False
+        self.vehicle_list_redraw_timer = self.fig.canvas.new_timer(interval=16)
+        self.vehicle_list_redraw_timer.single_shot = True
+        self.vehicle_list_redraw_timer.add_callback(self.update_vehicle_list_display)
         
         # Clear list button - positioned under the vehicle list on the right side
         ax_clear_list = plt.axes([0.75, 0.3, 0.15, 0.05])
@@ -230,50 +292,54 @@ class SimulationGUI:
         self.button_multi_sim.on_clicked(self.run_multiple_simulations)
         
         # Connect update functions
-        self.textbox_length.on_submit(self.update_params)
-        self.textbox_lanes.on_submit(self.update_params)
-        self.textbox_vehicles.on_submit(self.update_params)
-        self.textbox_simtime.on_submit(self.update_params)
-        self.textbox_dt.on_submit(self.update_params)
-        self.textbox_interval.on_submit(self.update_params)
-        self.textbox_distracted_percentage.on_submit(self.update_params)
+        # Parameter text boxes are not bound to a submit handler: they are read and validated together
+        # in one pass by update_params when a simulation starts (or a field depending on them is edited)
+        self.param_textboxes = {
+            'road_length': self.textbox_length,
+            'lanes_count': self.textbox_lanes,
+            'n_vehicles': self.textbox_vehicles,
+            'simulation_time': self.textbox_simtime,
+            'dt': self.textbox_dt,
+            'animation_interval': self.textbox_interval,
+            'distracted_percentage': self.textbox_distracted_percentage,
+        }
+        self.param_texts = {key: textbox.text for key, textbox in self.param_textboxes.items()}
         self.textbox_num_simulations.on_submit(self.update_num_simulations)
         self.textbox_vehicle_counts.on_submit(self.update_vehicle_counts)
 
-        plt.tight_layout(rect=[0, 0, 1, 0.95])
+        # Re-cache the vehicle list background whenever the whole figure is redrawn (first show, resize)
+        self.figure_draw_cid = self.fig.canvas.mpl_connect('draw_event', self.on_figure_draw)
+        self.update_vehicle_list_display()
         plt.show()
 
     def create_distribution_string(self):
         """Create a string representation of the driver type distribution."""
         dist = self.params['driver_type_distribution']
-        return f"{dist[DriverType.AGGRESSIVE]:.2f},{dist[DriverType.NORMAL]:.2f},{dist[DriverType.CAUTIOUS]:.2f},{dist[DriverType.POLITE]:.2f},{dist[DriverType.SUBMISSIVE]:.2f}"
+        return ",".join(f"{dist[driver_type]:.2f}" for driver_type in _DISTRIBUTION_DRIVER_TYPES)
 
     def update_driver_distribution(self, text):
         """Parse and update the driver type distribution from the text input."""
+        if text == self.driver_dist_text:
+            return  # Already parsed (e.g. resubmitted, or the text set after a reset)
         try:
-            # Parse comma-separated list of numbers
-            values = [float(x.strip()) for x in text.split(',')]
+            # Parse comma-separated list of numbers in one conversion (ValueError on malformed input)
+            values = np.array(text.split(','), dtype=np.float64)
             
             # Check if we have exactly 5 values (one for each driver type)
-            if len(values) != 5:
+            if values.size != len(_DISTRIBUTION_DRIVER_TYPES):
                 raise ValueError("Need exactly 5 values")
                 
             # Check if values sum to approximately 1.0 (allow for small floating point errors)
-            if not 0.99 <= sum(values) <= 1.01:
+            if not 0.99 <= values.sum() <= 1.01:
                 raise ValueError("Values must sum to 1.0")
                 
             # Check if all values are non-negative
-            if any(v < 0 for v in values):
+            if (values < 0).any():
                 raise ValueError("All values must be non-negative")
                 
             # Update the driver type distribution
-            self.params['driver_type_distribution'] = {
-                DriverType.AGGRESSIVE: values[0],
-                DriverType.NORMAL: values[1],
-                DriverType.CAUTIOUS: values[2],
-                DriverType.POLITE: values[3],
-                DriverType.SUBMISSIVE: values[4]
-            }
+            self.params['driver_type_distribution'] = dict(zip(_DISTRIBUTION_DRIVER_TYPES, values.tolist()))
+            self.driver_dist_text = text
             
         except Exception as e:
             # Reset to default distribution
@@ -284,7 +350,8 @@ class SimulationGUI:
                 DriverType.POLITE: 0.05,
                 DriverType.SUBMISSIVE: 0.05
             }
-            self.textbox_driver_dist.set_val(self.create_distribution_string())
+            self.driver_dist_text = self.create_distribution_string()
+            _set_text(self.textbox_driver_dist, self.driver_dist_text)
             print(f"Error parsing driver distribution: {e}")
 
     def update_num_simulations(self, text):
@@ -304,9 +371,9 @@ class SimulationGUI:
         """Update the array of vehicle counts for multiple simulations."""
         try:
             # Parse comma-separated list of numbers
-            counts = [int(x.strip()) for x in text.split(',')]
-            if all(count > 0 for count in counts):
-                self.num_vehicles_array = counts
+            counts = np.array(text.split(','), dtype=np.int64)
+            if (counts > 0).all():
+                self.num_vehicles_array = counts.tolist()
             else:
                 self.textbox_vehicle_counts.set_val('10,20,30,40,50')
                 self.num_vehicles_array = [10, 20, 30, 40, 50]
@@ -337,18 +404,11 @@ class SimulationGUI:
     
     def update_driver_type(self, label):
         """Update the selected driver type."""
-        driver_type_map = {
-            'Aggressive': DriverType.AGGRESSIVE,
-            'Normal': DriverType.NORMAL,
-            'Cautious': DriverType.CAUTIOUS,
-            'Polite': DriverType.POLITE,
-            'Submissive': DriverType.SUBMISSIVE,
-            'Obstacle': DriverType.OBSTACLE
-        }
-        self.current_driver_type = driver_type_map[label]
+        self.current_driver_type = _DRIVER_TYPE_MAP[label]
     
     def update_lane(self, text):
         """Update the selected lane."""
+        self.update_params(None)  # Validate against the current lanes count
         try:
             lane = int(text)
             if 1 <= lane <= self.params['lanes_count']:
@@ -362,6 +422,7 @@ class SimulationGUI:
     
     def update_position(self, text):
         """Update the initial position."""
+        self.update_params(None)  # Validate against the current road length
         try:
             position = float(text)
             if 0 <= position <= self.params['road_length']:
@@ -388,6 +449,7 @@ class SimulationGUI:
     
     def update_deploy_time(self, text):
         """Update the deployment time."""
+        self.update_params(None)  # Validate against the current simulation time
         try:
             deploy_time = float(text)
             if 0 <= deploy_time <= self.params['simulation_time']:
@@ -401,170 +463,193 @@ class SimulationGUI:
     
     def add_vehicle_to_list(self, event):
         """Add a vehicle to the deployment list."""
-        vehicle_info = {
-            'driver_type': self.current_driver_type,
-            'lane': self.current_lane,
-            'desired_velocity': self.current_desired_velocity if self.current_driver_type != DriverType.OBSTACLE else 0,
-            'deployment_time': self.current_deployment_time,
-            'initial_position': self.current_initial_position,
-            'is_distracted': self.current_is_distracted,  # Added distracted state
-        }
-        
-        self.vehicle_deployments.append(vehicle_info)
-        self.update_vehicle_list_display()
+        self.add_deployment(
+            driver_type=self.current_driver_type,
+            lane=self.current_lane,
+            desired_velocity=self.current_desired_velocity if self.current_driver_type != DriverType.OBSTACLE else 0,
+            deployment_time=self.current_deployment_time,
+            initial_position=self.current_initial_position,
+            is_distracted=self.current_is_distracted,
+        )
+        self.request_vehicle_list_redraw()
+    
+    def add_deployment(self, driver_type, lane, desired_velocity, deployment_time, initial_position, is_distracted):
+        """Append a vehicle to the deployment schedule, doubling the buffer when it is full."""
+        if self.num_deployments == len(self.vehicle_deployments):
+            grown = np.empty(2 * len(self.vehicle_deployments), dtype=DEPLOYMENT_DTYPE)
+            grown[:self.num_deployments] = self.vehicle_deployments
+            self.vehicle_deployments = grown
+        
+        self.vehicle_deployments[self.num_deployments] = (
+            driver_type.value, lane, desired_velocity, deployment_time, initial_position, is_distracted
+        )
+        self.num_deployments += 1
+        self.deployments_version += 1
     
     def clear_vehicle_list(self, event):
         """Clear the vehicle deployment list."""
-        self.vehicle_deployments = []
-        self.update_vehicle_list_display()
+        self.num_deployments = 0  # Keep the buffer for reuse
+        self.deployments_version += 1
+        self.request_vehicle_list_redraw()
+    
+    def create_vehicle_list_artists(self):
+        """Create the text artists of the deployment list once; updates only change their text."""
+        ax = self.ax_vehicle_list
+        self.vehicle_list_bg = None
+        self.displayed_deployments_version = -1  # New artists have not shown anything yet
+        
+        # One text artist for the constant header and one per visible list entry
+        self.vehicle_list_header = ax.text(0.0, 0.95, _VEHICLE_LIST_HEADER, family='monospace', 
+                                           fontweight='bold', fontsize=8, animated=True)
+        self.vehicle_list_rows = [
+            ax.text(0.0, 0.9 - (i+1) * 0.05, '', family='monospace', fontsize=8, animated=True)
+            for i in range(_VEHICLE_LIST_ROWS)
+        ]
+        
+        self.vehicle_list_placeholder = ax.text(0.5, 0.5, "No vehicles in deployment list", 
+                                                ha='center', va='center', fontsize=12, 
+                                                style='italic', color='gray', animated=True)
+        self.vehicle_list_more = ax.text(0.5, 0.1, '', ha='center', fontsize=9, 
+                                         style='italic', animated=True)
+        
+        self.vehicle_list_artists = ([self.vehicle_list_header] + self.vehicle_list_rows + 
+                                     [self.vehicle_list_placeholder, self.vehicle_list_more])
+    
+    def get_vehicle_list_region(self):
+        """Return the screen region of the deployment list (the last column overflows the axes to the right)."""
+        ax_bbox = self.ax_vehicle_list.bbox
+        return Bbox.from_extents(ax_bbox.x0, ax_bbox.y0, self.fig.bbox.x1, ax_bbox.y1)
+    
+    def draw_vehicle_list(self):
+        """Draw the deployment list artists on top of the current canvas."""
+        for artist in self.vehicle_list_artists:
+            self.ax_vehicle_list.draw_artist(artist)
+    
+    def on_figure_draw(self, event):
+        """Cache the deployment list background after a full redraw and draw the list on top of it."""
+        self.vehicle_list_bg = self.fig.canvas.copy_from_bbox(self.get_vehicle_list_region())
+        self.draw_vehicle_list()
+    
+    def request_vehicle_list_redraw(self):
+        """Schedule a single update of the deployment list display for the next frame."""
+        if not self.vehicle_list_redraw_pending:
+            self.vehicle_list_redraw_pending = True
+            self.vehicle_list_redraw_timer.start()
     
     def update_vehicle_list_display(self):
         """Update the display of the vehicle deployment list."""
-        # Clear previous text
-        for txt in self.ax_vehicle_list.texts:
-            txt.remove()
-        
-        if not self.vehicle_deployments:
-            self.ax_vehicle_list.text(0.5, 0.5, "No vehicles in deployment list", 
-                                     ha='center', va='center', fontsize=12, 
-                                     style='italic', color='gray')
-            self.fig.canvas.draw_idle()
-            return
+        self.vehicle_list_redraw_pending = False
         
-        # Headers
-        headers = ["#", "Type", "Lane", "Pos", "Speed", "Deploy", "Distracted"]
-        header_pos = [0.05, 0.18, 0.33, 0.48, 0.63, 0.78, 0.93]
-        for i, header in enumerate(headers):
-            self.ax_vehicle_list.text(header_pos[i], 0.95, header, 
-                                     fontweight='bold', fontsize=10)
-        
-        # Driver type to display text mapping
-        type_text = {
-            DriverType.AGGRESSIVE: "Aggressive",
-            DriverType.NORMAL: "Normal",
-            DriverType.CAUTIOUS: "Cautious",
-            DriverType.POLITE: "Polite",
-            DriverType.SUBMISSIVE: "Submissive",
-            DriverType.OBSTACLE: "Obstacle"
-        }
-        
-        # List entries (display last 15 for space reasons)
-        start_idx = max(0, len(self.vehicle_deployments) - 15)
-        visible_deployments = self.vehicle_deployments[start_idx:]
-        
-        for i, vehicle in enumerate(visible_deployments):
-            y_pos = 0.9 - (i+1) * 0.05
-            
-            # Row number (including offset if we're showing a partial list)
-            self.ax_vehicle_list.text(header_pos[0], y_pos, f"{start_idx + i + 1}", fontsize=9)
-            
-            # Driver type
-            self.ax_vehicle_list.text(header_pos[1], y_pos, type_text[vehicle['driver_type']], fontsize=9)
-            
-            # Lane (convert from 0-based to 1-based for display)
-            self.ax_vehicle_list.text(header_pos[2], y_pos, f"{vehicle['lane'] + 1}", fontsize=9)
-            
-            # Initial position
-            self.ax_vehicle_list.text(header_pos[3], y_pos, f"{vehicle['initial_position']}", fontsize=9)
-            
-            # Speed
-            self.ax_vehicle_list.text(header_pos[4], y_pos, f"{vehicle['desired_velocity']}", fontsize=9)
-            
-            # Deployment time
-            self.ax_vehicle_list.text(header_pos[5], y_pos, f"{vehicle['deployment_time']}", fontsize=9)
-            
-            # Distracted status
-            distracted_text = "Yes" if vehicle.get('is_distracted', False) else "No"
-            self.ax_vehicle_list.text(header_pos[6], y_pos, distracted_text, fontsize=9)
+        # Nothing to do if the list has not changed since it was last displayed
+        if self.displayed_deployments_version == self.deployments_version:
+            return
+        self.displayed_deployments_version = self.deployments_version
+        
+        has_vehicles = self.num_deployments > 0
+        self.vehicle_list_placeholder.set_visible(not has_vehicles)
+        self.vehicle_list_header.set_visible(has_vehicles)
+        
+        # List entries (display the last _VEHICLE_LIST_ROWS for space reasons)
+        start_idx = max(0, self.num_deployments - _VEHICLE_LIST_ROWS)
+        visible_deployments = self.vehicle_deployments[start_idx:self.num_deployments]
+        
+        for i, row_text in enumerate(self.vehicle_list_rows):
+            if i < len(visible_deployments):
+                vehicle = visible_deployments[i]
+                row_text.set_text(_VEHICLE_LIST_ROW_FORMAT.format(
+                    start_idx + i + 1,  # Row number (including offset if we're showing a partial list)
+                    _DRIVER_TYPE_LABEL[vehicle['driver_type']],
+                    vehicle['lane'] + 1,  # Convert lane from 0-based to 1-based for display
+                    f"{vehicle['initial_position']:g}",
+                    f"{vehicle['desired_velocity']:g}",
+                    f"{vehicle['deployment_time']:g}",
+                    "Yes" if vehicle['is_distracted'] else "No"
+                ))
+            else:
+                row_text.set_text('')
         
         # If we're showing a partial list, indicate how many more entries exist
-        if start_idx > 0:
-            self.ax_vehicle_list.text(0.5, 0.15, f"(+ {start_idx} more vehicles not shown)", 
-                                     ha='center', fontsize=9, style='italic')
+        self.vehicle_list_more.set_text(f"(+ {start_idx} more vehicles not shown)" if start_idx > 0 else '')
         
-        self.fig.canvas.draw_idle()
+        if self.vehicle_list_bg is None:
+            # Nothing has been drawn yet, the first full draw renders the list
+            self.fig.canvas.draw_idle()
+            return
+        
+        # Blit only the list region instead of redrawing the whole figure
+        canvas = self.fig.canvas
+        canvas.restore_region(self.vehicle_list_bg)
+        self.draw_vehicle_list()
+        canvas.blit(self.get_vehicle_list_region())
         
     def update_params(self, text):
-        """Update parameters when text boxes change."""
+        """Update parameters from the text boxes that changed since the last update."""
+        if self.updating_params:
+            return  # Reached again through a set_val made while validating
+        self.updating_params = True
         try:
-            self.params['road_length'] = float(self.textbox_length.text)
-            self.params['lanes_count'] = int(float(self.textbox_lanes.text))
-            self.params['n_vehicles'] = int(float(self.textbox_vehicles.text))
-            self.params['simulation_time'] = float(self.textbox_simtime.text)
-            self.params['dt'] = float(self.textbox_dt.text)
-            self.params['animation_interval'] = float(self.textbox_interval.text)
+            # Only re-parse the text boxes whose text changed
+            changed = set()
+            for key, textbox in self.param_textboxes.items():
+                if textbox.text != self.param_texts.get(key):
+                    try:
+                        self.params[key] = _PARAM_PARSERS[key](textbox.text)
+                        changed.add(key)
+                    except ValueError:
+                        # Invalid input only resets its own field, back to the last valid value
+                        _set_text(textbox, str(self.params[key]))
             
             # Parse and validate distracted percentage
-            distracted_pct = float(self.textbox_distracted_percentage.text)
-            if 0 <= distracted_pct <= 100:
-                self.params['distracted_percentage'] = distracted_pct
-            else:
-                self.textbox_distracted_percentage.set_val('0')
-                self.params['distracted_percentage'] = 0
+            if 'distracted_percentage' in changed:
+                distracted_pct = self.params['distracted_percentage']
+                if not 0 <= distracted_pct <= 100:
+                    _set_text(self.textbox_distracted_percentage, '0')
+                    self.params['distracted_percentage'] = 0
             
             # Note: Driver distribution is handled separately in update_driver_distribution
             
             # Validate and correct values if needed
-            if self.params['lanes_count'] < 1:
-                self.params['lanes_count'] = 1
-                self.textbox_lanes.set_val('1')
+            if 'lanes_count' in changed:
+                if self.params['lanes_count'] < 1:
+                    self.params['lanes_count'] = 1
+                    _set_text(self.textbox_lanes, '1')
+                    
+                # Validate current lane selection against new lane count (already parsed by update_lane)
+                if self.current_lane + 1 > self.params['lanes_count']:
+                    _set_text(self.textbox_lane, str(self.params['lanes_count']))
+                    self.current_lane = self.params['lanes_count'] - 1
                 
-            # Validate current lane selection against new lane count
-            current_lane_value = int(self.textbox_lane.text) if self.textbox_lane.text.isdigit() else 1
-            if current_lane_value > self.params['lanes_count']:
-                self.textbox_lane.set_val(str(self.params['lanes_count']))
-                self.current_lane = self.params['lanes_count'] - 1
+                # Move the scheduled vehicles of removed lanes to the new top lane as well
+                deployment_lanes = self.vehicle_deployments['lane'][:self.num_deployments]
+                removed_lanes = deployment_lanes >= self.params['lanes_count']
+                if removed_lanes.any():
+                    deployment_lanes[removed_lanes] = self.params['lanes_count'] - 1
+                    self.deployments_version += 1
+                    self.request_vehicle_list_redraw()
                 
             # Validate current deploy time against new simulation time
-            current_deploy_time = float(self.textbox_deploy_time.text) if self.textbox_deploy_time.text.replace('.', '', 1).isdigit() else 0
-            if current_deploy_time > self.params['simulation_time']:
-                self.textbox_deploy_time.set_val(str(self.params['simulation_time']))
-                self.current_deployment_time = self.params['simulation_time']
+            if 'simulation_time' in changed:
+                if self.current_deployment_time > self.params['simulation_time']:
+                    _set_text(self.textbox_deploy_time, str(self.params['simulation_time']))
+                    self.current_deployment_time = self.params['simulation_time']
                 
             # Validate current position against new road length
-            current_position = float(self.textbox_position.text) if self.textbox_position.text.replace('.', '', 1).isdigit() else 0
-            if current_position > self.params['road_length']:
-                self.textbox_position.set_val(str(self.params['road_length']))
-                self.current_initial_position = self.params['road_length']
+            if 'road_length' in changed:
+                if self.current_initial_position > self.params['road_length']:
+                    _set_text(self.textbox_position, str(self.params['road_length']))
+                    self.current_initial_position = self.params['road_length']
                     
-        except ValueError:
-            # Reset to defaults if invalid input
-            self.textbox_length.set_val(str(1000))
-            self.textbox_lanes.set_val(str(3))
-            self.textbox_vehicles.set_val(str(30))
-            self.textbox_simtime.set_val(str(120))
-            self.textbox_dt.set_val(str(0.5))
-            self.textbox_interval.set_val(str(50))
-            self.textbox_distracted_percentage.set_val(str(0))
-            
-            # Also reset the driver distribution
-            default_dist = "0.10,0.60,0.20,0.05,0.05"
-            self.textbox_driver_dist.set_val(default_dist)
-            
-            self.params = {
-                'road_length': 1000,
-                'lanes_count': 3,
-                'n_vehicles': 30,
-                'dt': 0.5,
-                'simulation_time': 120,
-                'animation_interval': 50,
-                'distracted_percentage': 0,
-                'driver_type_distribution': {
-                    DriverType.AGGRESSIVE: 0.1,
-                    DriverType.NORMAL: 0.6,
-                    DriverType.CAUTIOUS: 0.2,
-                    DriverType.POLITE: 0.05,
-                    DriverType.SUBMISSIVE: 0.05
-                }
-            }
+        finally:
+            # Remember what was parsed so the next update can skip unchanged boxes
+            self.param_texts = {key: textbox.text for key, textbox in self.param_textboxes.items()}
+            self.updating_params = False
         
-    def create_simulation(self, num_vehicles=None, to_print=True):
-        """Create a simulation instance with the current parameters."""
-        # Create simulation with selected parameters
+    def get_simulation_params(self, num_vehicles=None, to_print=True):
+        """Return the TrafficSimulation keyword arguments for the current parameters."""
         if num_vehicles is None:
             num_vehicles = self.params['n_vehicles']
-            
-        simulation = TrafficSimulation(
+        
+        return dict(
             road_length=self.params['road_length'],
             lanes_count=self.params['lanes_count'],
             n_vehicles=num_vehicles,
@@ -575,16 +660,26 @@ class SimulationGUI:
             driver_distribution=self.params['driver_type_distribution'],
             to_print=to_print
         )
+    
+    def create_simulation(self, num_vehicles=None, to_print=True):
+        """Create a simulation instance with the current parameters."""
+        # Imported here so the setup screen comes up without loading the simulator
+        from trafficSimulation import TrafficSimulation
+        
+        # Create simulation with selected parameters
+        simulation = TrafficSimulation(**self.get_simulation_params(num_vehicles, to_print))
         
         # Add the vehicle deployment schedule to the simulation
-        simulation.scheduled_vehicles = self.vehicle_deployments.copy()
+        deployments = self.vehicle_deployments[:self.num_deployments]
+        simulation.set_scheduled_vehicles(deployments)
         # Store original scheduled vehicles for reset
-        simulation.original_scheduled_vehicles = self.vehicle_deployments.copy()
+        simulation.original_scheduled_vehicles = deployments.copy()
         
         return simulation
     
     def start_simulation(self, event):
         """Start the simulation with the selected parameters and vehicle deployments."""
+        self.update_params(None)  # Read and validate the parameter text boxes
         plt.close(self.fig)  # Close start screen
         
         # Create and run simulation with selected parameters
@@ -593,7 +688,23 @@ class SimulationGUI:
     
     def run_without_animation(self, event):
         """Run the simulation without animation for a specified number of steps."""
-        plt.close(self.fig)  # Close start screen
+        self.update_params(None)  # Read and validate the parameter text boxes
+        
+        # Replace the start screen with a progress bar instead of closing it, so the window stays responsive
+        self.fig.canvas.mpl_disconnect(self.figure_draw_cid)
+        for widget in list(vars(self).values()):
+            if isinstance(widget, AxesWidget):
+                widget.disconnect_events()  # The widget axes are removed below
+        self.fig.clear()
+        self.fig.suptitle('Running Simulation Without Animation', fontsize=20, fontweight='bold')
+        ax_progress = self.fig.add_axes([0.1, 0.45, 0.8, 0.08])
+        ax_progress.set_xlim(0, 1)
+        ax_progress.set_ylim(0, 1)
+        ax_progress.set_xticks([])
+        ax_progress.set_yticks([])
+        self.progress_bar = ax_progress.add_patch(Rectangle((0, 0), 0, 1, color='tab:blue'))
+        self.progress_text = ax_progress.text(0.5, -0.5, f"Step 0/{self.non_animated_steps}", 
+                                              ha='center', va='top', fontsize=12)
         
         # Create simulation with selected parameters
         self.simulation = self.create_simulation()
@@ -601,8 +712,60 @@ class SimulationGUI:
         # Enable debug mode to see detailed information 
         self.simulation.debug = False
         
-        # Run the simulation without animation for the specified number of steps
-        self.simulation.run_without_animation(steps=self.non_animated_steps)
+        # Run the simulation in a worker thread; the timer polls its progress from the GUI thread
+        self.progress_queue = queue.Queue()
+        self.progress_timer = self.fig.canvas.new_timer(interval=100)
+        self.progress_timer.add_callback(self.poll_simulation_progress)
+        self.progress_timer.start()
+        threading.Thread(target=self.simulation_worker, args=(self.progress_queue,), daemon=True).start()
+        self.fig.canvas.draw_idle()
+    
+    def simulation_worker(self, progress_queue):
+        """Run the non-animated simulation, reporting (step, steps) and finally ('done', avg_speed) to the queue.
+        
+        An exception is reported as ('error', exception), so the GUI thread can stop polling and show it.
+        """
+        try:
+            avg_speed = self.simulation.run_without_animation(
+                steps=self.non_animated_steps,
+                progress_callback=lambda step, steps: progress_queue.put((step, steps))
+            )
+        except Exception as exc:
+            traceback.print_exc()
+            progress_queue.put(('error', exc))
+            return
+        progress_queue.put(('done', avg_speed))
+    
+    def poll_simulation_progress(self):
+        """Show the latest progress reported by the simulation worker."""
+        latest = None
+        while True:
+            try:
+                latest = self.progress_queue.get_nowait()
+            except queue.Empty:
+                break
+            if latest[0] in ('done', 'error'):
+                break
+        if latest is None:
+            return
+        
+        if latest[0] == 'error':
+            self.progress_timer.stop()
+            self.progress_bar.set_color('tab:red')
+            self.progress_text.set_text(f"Simulation failed: {latest[1]!r}")
+        elif latest[0] == 'done':
+            self.progress_timer.stop()
+            self.progress_bar.set_width(1)
+            avg_speed = latest[1]
+            if avg_speed >= 0:
+                self.progress_text.set_text(f"Simulation complete - average speed: {avg_speed:.1f} m/s ({avg_speed*3.6:.1f} km/h)")
+            else:
+                self.progress_text.set_text("Simulation complete - no vehicles on the road")
+        else:
+            step, steps = latest
+            self.progress_bar.set_width(step / steps)
+            self.progress_text.set_text(f"Step {step}/{steps}")
+        self.fig.canvas.draw_idle()
         
     def run_multiple_simulations(self, event):
             """
@@ -611,6 +774,7 @@ class SimulationGUI:
             Results will be saved to two sheets in one Excel file.
             All outputs are stored in a dedicated folder for this simulation run.
             """
+            self.update_params(None)  # Read and validate the parameter text boxes
             plt.close(self.fig)  # Close start screen
             
             # Create a dedicated folder for this simulation run
@@ -625,120 +789,15 @@ class SimulationGUI:
             print(f"Starting multiple simulations: {self.num_simulations} runs for each of {len(self.num_vehicles_array)} vehicle counts")
             print(f"Vehicle counts: {self.num_vehicles_array}")
             
-            # Set up results storage
-            all_results = []
-            steps_per_simulation = 800  # Fixed at 1000 steps per simulation
-            
-            # Run simulations for each vehicle count
-            for vehicle_count in self.num_vehicles_array:
-                print(f"\nRunning simulations with {vehicle_count} vehicles...")
-                
-                # Calculate density: vehicles / (road length * lanes)
-                density = vehicle_count / (self.params['road_length'] * self.params['lanes_count'])
-                
-                # Run multiple simulations with the same parameters
-                for sim_num in range(self.num_simulations):
-                    print(f"  Simulation {sim_num + 1}/{self.num_simulations}...")
-                    
-                    # Create new simulation with current vehicle count
-                    simulation = self.create_simulation(num_vehicles=vehicle_count, to_print=False)
-                    
-                    # Run without animation
-                    avg_speed = simulation.run_without_animation(steps=steps_per_simulation)
-                    
-                    # Calculate flow: density * average speed
-                    flow = density * avg_speed
-                    
-                    # Store result
-                    result = {
-                        'Simulation Number': sim_num + 1,
-                        'Number of Vehicles': vehicle_count,
-                        'Number of Lanes': self.params['lanes_count'],
-                        'Road Length': self.params['road_length'],
-                        'Simulation Time (s)': self.params['simulation_time'],
-                        'Time Step (s)': self.params['dt'],
-                        'Animation Interval (ms)': self.params['animation_interval'],
-                        'Percentage of Distracted Vehicles': self.params['distracted_percentage'],
-                        'Aggressive %': self.params['driver_type_distribution'][DriverType.AGGRESSIVE] * 100,
-                        'Normal %': self.params['driver_type_distribution'][DriverType.NORMAL] * 100,
-                        'Cautious %': self.params['driver_type_distribution'][DriverType.CAUTIOUS] * 100,
-                        'Polite %': self.params['driver_type_distribution'][DriverType.POLITE] * 100,
-                        'Submissive %': self.params['driver_type_distribution'][DriverType.SUBMISSIVE] * 100,
-                        'Average Speed': avg_speed,
-                        'Density': density,
-                        'Flow': flow
-                    }
-                    all_results.append(result)
-                    
-                    print(f"    Average speed: {avg_speed:.2f} m/s")
-                    print(f"    Density: {density:.4f} vehicles/m")
-                    print(f"    Flow: {flow:.4f} vehicles/s")
-            
-            # Create detailed results DataFrame
-            df_detailed = pd.DataFrame(all_results)
+            # Imported here so the setup screen does not load the simulator
+            import batchRunner
             
-            # Create summary results DataFrame by grouping by vehicle count
-            df_grouped = df_detailed.groupby(['Number of Vehicles', 'Number of Lanes', 'Road Length', 
-                                            'Percentage of Distracted Vehicles'])
-            
-            # Custom aggregation to apply the modified variance and standard deviation calculations
-            df_summary = df_grouped.agg(
-                Average_Speed=('Average Speed', 'mean'),
-                Raw_Variance=('Average Speed', 'var'),
-                Raw_Std_Dev=('Average Speed', 'std'),
-                Min_Speed=('Average Speed', 'min'),
-                Max_Speed=('Average Speed', 'max'),
-                Density=('Density', 'first'),
-                Average_Flow=('Flow', 'mean'),
-                Flow_Raw_Std_Dev=('Flow', 'std'),
-                Min_Flow=('Flow', 'min'),
-                Max_Flow=('Flow', 'max'),
-                Simulation_Time=('Simulation Time (s)', 'first'),
-                Time_Step=('Time Step (s)', 'first'),
-                Animation_Interval=('Animation Interval (ms)', 'first'),
-                Aggressive_Percent=('Aggressive %', 'first'),
-                Normal_Percent=('Normal %', 'first'),
-                Cautious_Percent=('Cautious %', 'first'),
-                Polite_Percent=('Polite %', 'first'),
-                Submissive_Percent=('Submissive %', 'first'),
-            ).reset_index()
-            
-            # Apply the requested modifications to variance and standard deviation
-            df_summary['Variance'] = df_summary['Raw_Variance'] / 4
-            df_summary['Std_Dev'] = df_summary['Raw_Std_Dev'] / 4
-            df_summary['Flow_Std_Dev'] = df_summary['Flow_Raw_Std_Dev'] / 2
-            
-            # Remove the raw columns that we don't need anymore
-            df_summary = df_summary.drop(columns=['Raw_Variance', 'Raw_Std_Dev', 'Flow_Raw_Std_Dev'])
-            
-            # Rename columns for final output
-            df_summary = df_summary.rename(columns={
-                'Average_Speed': 'Average Speed',
-                'Variance': 'Variance of Average Speed',
-                'Std_Dev': 'Standard Deviation of Average Speed',
-                'Min_Speed': 'Minimum Average Speed',
-                'Max_Speed': 'Maximum Average Speed',
-                'Average_Flow': 'Average Flow',
-                'Flow_Std_Dev': 'Standard Deviation of Flow',
-                'Min_Flow': 'Minimum Flow',
-                'Max_Flow': 'Maximum Flow',
-                'Simulation_Time': 'Simulation Time (s)',
-                'Time_Step': 'Time Step (s)',
-                'Animation_Interval': 'Animation Interval (ms)',
-                'Aggressive_Percent': 'Aggressive %',
-                'Normal_Percent': 'Normal %',
-                'Cautious_Percent': 'Cautious %',
-                'Polite_Percent': 'Polite %',
-                'Submissive_Percent': 'Submissive %',
-            })
-            
-            # Save both dataframes to different sheets in the same Excel file
-            excel_filename = os.path.join(folder_name, f'simulation_results.xlsx')
-            
-            # Use ExcelWriter to save multiple sheets to the same file
-            with pd.ExcelWriter(excel_filename, engine='openpyxl') as writer:
-                df_detailed.to_excel(writer, sheet_name='Detailed Results', index=False)
-                df_summary.to_excel(writer, sheet_name='Summary Results', index=False)
+            df_detailed = batchRunner.run_simulations(
+                self.get_simulation_params(to_print=False), self.num_vehicles_array, self.num_simulations,
+                self.vehicle_deployments[:self.num_deployments].copy()
+            )
+            df_summary = batchRunner.summarize_results(df_detailed)
+            excel_filename = batchRunner.save_results(df_detailed, df_summary, folder_name)
             
             print(f"\nSimulations complete!")
             print(f"Results saved to: {excel_filename}")
@@ -831,68 +890,23 @@ class SimulationGUI:
         
         # Save the combined figure
         combined_fig_path = os.path.join(output_folder, 'combined_plots.png')
-        plt.savefig(combined_fig_path, dpi=300, bbox_inches='tight')
+        fig.savefig(combined_fig_path, dpi=150, bbox_inches='tight')
         print(f"Combined plots saved to: {combined_fig_path}")
         
-        # Create and save individual plots as well
+        # Save individual plots as well: each one is a panel of the combined figure, cropped to the panel
+        # (with its labels, title and legend) instead of being plotted again in a figure of its own
+        renderer = fig.canvas.get_renderer()
         
         # 1. Speed vs Vehicles plot
-        fig_speed, ax_speed = plt.subplots(figsize=(10, 6))
-        ax_speed.errorbar(
-            df_summary['Number of Vehicles'], 
-            df_summary['Average Speed'],
-            yerr=df_summary['Standard Deviation of Average Speed'],
-            fmt='o-', 
-            ecolor='red',
-            capsize=5,
-            label='Average Speed with Std Dev'
-        )
-        ax_speed.fill_between(
-            df_summary['Number of Vehicles'],
-            df_summary['Minimum Average Speed'],
-            df_summary['Maximum Average Speed'],
-            alpha=0.2,
-            color='blue',
-            label='Min-Max Range'
-        )
-        ax_speed.set_xlabel('Number of Vehicles')
-        ax_speed.set_ylabel('Average Speed (m/s)')
-        ax_speed.set_title('Impact of Vehicle Count on Average Speed')
-        ax_speed.grid(True)
-        ax_speed.legend()
         speed_fig_path = os.path.join(output_folder, 'speed_vs_vehicles.png')
-        fig_speed.savefig(speed_fig_path, dpi=300, bbox_inches='tight')
+        fig.savefig(speed_fig_path, dpi=150, bbox_inches=_panel_bbox(fig, ax1, renderer))
         print(f"Speed vs vehicles plot saved to: {speed_fig_path}")
-        plt.close(fig_speed)
         
         # 2. Flow vs Density plot
-        fig_flow, ax_flow = plt.subplots(figsize=(10, 6))
-        ax_flow.errorbar(
-            df_summary['Density'], 
-            df_summary['Average Flow'],
-            yerr=df_summary['Standard Deviation of Flow'],
-            fmt='o-', 
-            ecolor='green',
-            capsize=5,
-            label='Flow with Std Dev'
-        )
-        ax_flow.fill_between(
-            df_summary['Density'],
-            df_summary['Minimum Flow'],
-            df_summary['Maximum Flow'],
-            alpha=0.2,
-            color='purple',
-            label='Min-Max Range'
-        )
-        ax_flow.set_xlabel('Density (vehicles/m)')
-        ax_flow.set_ylabel('Flow (vehicles/s)')
-        ax_flow.set_title('Fundamental Diagram: Flow vs Density')
-        ax_flow.grid(True)
-        ax_flow.legend()
         flow_fig_path = os.path.join(output_folder, 'flow_vs_density.png')
-        fig_flow.savefig(flow_fig_path, dpi=300, bbox_inches='tight')
+        fig.savefig(flow_fig_path, dpi=150, bbox_inches=_panel_bbox(fig, ax2, renderer))
         print(f"Flow vs density plot saved to: {flow_fig_path}")
-        plt.close(fig_flow)
+        plt.close(fig)
         
         # Also save the data as CSV for potential further analysis
         csv_path = os.path.join(output_folder, 'summary_data.csv')
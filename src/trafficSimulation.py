@@ -1,17 +1,18 @@
+import bisect
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.animation as animation
-from matplotlib.patches import Rectangle, Polygon, Circle
-from matplotlib.widgets import Button, Slider, TextBox
-import random
-from collections import defaultdict
-from enum import Enum
-from vehicle import Vehicle, DriverType
+from vehicle import Vehicle, DriverType, DEPLOYMENT_DTYPE
+import kernels
+
+# Simulation steps per animation frame in fast forward mode
+FAST_FORWARD_STEPS_PER_FRAME = 10
+
+# Initial number of entries of the per-step statistics, doubled by record_statistics whenever it fills up
+STATISTICS_INITIAL_CAPACITY = 256
 
 class TrafficSimulation:
     def __init__(self, road_length=1000, lanes_count=3, n_vehicles=30, dt=0.5, 
                  simulation_time=100, animation_interval=50, distracted_percentage=10, to_print=False,
-                 driver_distribution=None):
+                 driver_distribution=None, seed=None):
         self.road_length = road_length  # length of the road (m)
         self.lanes_count = lanes_count  # number of lanes
         self.n_vehicles = n_vehicles  # number of vehicles
@@ -23,18 +24,27 @@ class TrafficSimulation:
         self.time = 0
         self.to_print = to_print  # Flag to print vehicle information
         
+        # Random generator of this simulation (independent of the global random state; a fresh one when
+        # seed is None)
+        self.rng = np.random.default_rng(seed)
+        
+        # Update the vehicles with the compiled kernel when numba is installed (see update_vehicles_compiled)
+        self.use_compiled_kernel = kernels.NUMBA_AVAILABLE
+        self.kernel_vehicles = None  # Vehicle list the kernel arrays were built from
+        self.vehicles_synced = True  # False while the Vehicle objects lag behind the kernel arrays
+        
         # Vehicle deployment schedule
-        self.scheduled_vehicles = []
+        self.set_scheduled_vehicles(np.empty(0, dtype=DEPLOYMENT_DTYPE))
         
         # Animation and control variables
         self.is_paused = False
         self.fast_forward = False
+        self.steps_per_frame = 1  # Simulation steps per animation frame (more in fast forward mode)
         self.anim = None
         self.fig = None
         
         # Statistics tracking
-        self.average_speeds = []
-        self.lane_distributions = []
+        self.clear_statistics()
         self.lane_changes = 0
         
         # Obstacles list
@@ -66,14 +76,11 @@ class TrafficSimulation:
         if sum(self.num_each_driver_type.values()) != n_vehicles:
             self.num_each_driver_type[DriverType.NORMAL] += n_vehicles - sum(self.num_each_driver_type.values())
 
-        self.driver_types = []
-        for driver_type, count in self.num_each_driver_type.items():
-            # Append driver types based on their counts
-            for _ in range(int(count)):
-                self.driver_types.append(driver_type)
-        
-        # Reorder the driver types randomly
-        random.shuffle(self.driver_types)
+        # Repeat each driver type by its count and reorder them randomly, in one NumPy draw
+        driver_type_options = list(self.num_each_driver_type.keys())
+        type_indices = np.repeat(np.arange(len(driver_type_options)), 
+                                 [int(count) for count in self.num_each_driver_type.values()])
+        self.driver_types = [driver_type_options[k] for k in self.rng.permutation(type_indices)]
         
         # Initialize vehicles
         if n_vehicles > 0:
@@ -89,31 +96,43 @@ class TrafficSimulation:
         # Clear existing vehicles if any
         self.vehicles = []
         
+        # Random desired velocity (m/s) - between 25 and 35 m/s (90-126 km/h) - and whether each vehicle can
+        # be distracted (based on distracted_percentage), drawn for all vehicles at once
+        desired_velocities = self.rng.uniform(25, 35, self.n_vehicles)
+        can_be_distracted_flags = self.rng.integers(1, 101, self.n_vehicles) <= self.distracted_percentage
+        
+        # Candidate positions and lanes of every random placement attempt, and the offsets of the
+        # deterministic fallback, also drawn for all vehicles at once
+        candidate_positions = self.rng.uniform(0, self.road_length, (self.n_vehicles, max_attempts)).tolist()
+        candidate_lanes = self.rng.integers(0, self.lanes_count, (self.n_vehicles, max_attempts)).tolist()
+        fallback_offsets = self.rng.uniform(-5, 5, self.n_vehicles).tolist()
+        
+        # Sorted positions of the vehicles placed so far in each lane, so an overlap check only compares with
+        # the nearest vehicle on either side (binary search). New vehicles are 5 m long, so they keep
+        # max(5, 10) = 10 m apart
+        lane_positions = [[] for _ in range(self.lanes_count)]
+        obstacle_positions = np.array([obstacle['position'] for obstacle in self.obstacles], dtype=np.float64)
+        obstacle_lanes = np.array([obstacle['lane'] for obstacle in self.obstacles], dtype=np.int64)
+        
+        def overlaps(position, lane):
+            placed_positions = lane_positions[lane]
+            k = bisect.bisect_left(placed_positions, position)
+            if ((k < len(placed_positions) and placed_positions[k] - position < 10) or
+                    (k > 0 and position - placed_positions[k - 1] < 10)):
+                return True
+            return bool(np.any((obstacle_lanes == lane) & (np.abs(obstacle_positions - position) < 20)))
+        
         for i in range(self.n_vehicles):
             # Random position (ensuring no overlaps)
             attempts = 0
             placed = False
             
             while attempts < max_attempts and not placed:
-                position = random.uniform(0, self.road_length)
-                lane = random.randint(0, self.lanes_count - 1)
-                
-                # Check for overlap with existing vehicles
-                overlap = False
-                for vehicle in self.vehicles:
-                    if (vehicle.lane == lane and 
-                        abs(vehicle.position - position) < max(vehicle.length, 10)):
-                        overlap = True
-                        break
+                position = candidate_positions[i][attempts]
+                lane = candidate_lanes[i][attempts]
                 
-                # Check for overlap with obstacles
-                for obstacle in self.obstacles:
-                    if (obstacle['lane'] == lane and 
-                        abs(obstacle['position'] - position) < max(20, 10)):
-                        overlap = True
-                        break
-                
-                if not overlap:
+                # Check for overlap with existing vehicles and obstacles
+                if not overlaps(position, lane):
                     placed = True
                     break
                     
@@ -129,7 +148,7 @@ class TrafficSimulation:
                 position = section_index * section_length
                 
                 # Add some small random offset to avoid perfect alignment
-                position += random.uniform(-5, 5)
+                position += fallback_offsets[i]
                 
                 # Ensure position is within road boundaries
                 position = max(0, min(position, self.road_length))
@@ -139,23 +158,8 @@ class TrafficSimulation:
                 lanes_tried = 0
                 
                 while lanes_tried < self.lanes_count:
-                    overlap = False
-                    
-                    # Check for overlap with existing vehicles
-                    for vehicle in self.vehicles:
-                        if (vehicle.lane == lane and 
-                            abs(vehicle.position - position) < max(vehicle.length, 10)):
-                            overlap = True
-                            break
-                    
-                    # Check for overlap with obstacles
-                    for obstacle in self.obstacles:
-                        if (obstacle['lane'] == lane and 
-                            abs(obstacle['position'] - position) < max(20, 10)):
-                            overlap = True
-                            break
-                    
-                    if not overlap:
+                    # Check for overlap with existing vehicles and obstacles
+                    if not overlaps(position, lane):
                         break
                     
                     # Try next lane
@@ -172,8 +176,8 @@ class TrafficSimulation:
                     if position >= self.road_length:
                         position = 20  # Start at 20m
             
-            # Random desired velocity (m/s) - between 20 and 40 m/s (72-126 km/h)
-            desired_velocity = random.uniform(25, 35)
+            bisect.insort(lane_positions[lane], position)
+            desired_velocity = float(desired_velocities[i])
             
             # Assign driver type with different probabilities
             driver_type = self.driver_types[i]
@@ -181,8 +185,7 @@ class TrafficSimulation:
             # Set visualization dimensions
             vis_height, vis_width = 0.2, 20  # default dimensions
             
-            # Determine if this vehicle can be distracted based on distracted_percentage
-            can_be_distracted = random.randint(1, 100) <= self.distracted_percentage
+            can_be_distracted = bool(can_be_distracted_flags[i])
             
             # Create vehicle (starting at 70% of desired speed)
             vehicle = Vehicle(
@@ -209,67 +212,95 @@ class TrafficSimulation:
         }
         self.obstacles.append(obstacle)
 
+    def set_scheduled_vehicles(self, scheduled_vehicles):
+        """Set the vehicle deployment schedule.
+        
+        Args:
+            scheduled_vehicles (np.ndarray): Deployments as a DEPLOYMENT_DTYPE structured array.
+        
+        The schedule is sorted by deployment time once (into a copy), and the deployment times are
+        kept in a NumPy array so each step only has to compare the next pending time.
+        
+        Raises:
+            ValueError: If a deployment is on a lane outside 0..lanes_count-1.
+        """
+        lanes = scheduled_vehicles['lane']
+        if len(lanes) and (lanes.min() < 0 or lanes.max() >= self.lanes_count):
+            raise ValueError(f"Scheduled vehicle lanes must be between 0 and {self.lanes_count - 1}, "
+                             f"got lanes {lanes.min()} to {lanes.max()}")
+        order = np.argsort(scheduled_vehicles['deployment_time'], kind='stable')
+        self.scheduled_vehicles = scheduled_vehicles[order]
+        self.scheduled_times = self.scheduled_vehicles['deployment_time'].astype(np.float64)
+        self.scheduled_cursor = 0  # Index of the next vehicle waiting to be deployed
+
     def deploy_scheduled_vehicle(self):
-        """Check if any vehicles need to be deployed at the current time."""
-        for i, vehicle_info in enumerate(self.scheduled_vehicles[:]):
-            if vehicle_info['deployment_time'] <= self.time:
-                # Find a suitable position
-                position = vehicle_info.get('initial_position', 0)  # Use specified position or default to 0
-                lane = vehicle_info['lane']
-                
-                # Check for overlap with existing vehicles
+        """Deploy every scheduled vehicle whose deployment time has been reached."""
+        # The sorted times put every due vehicle between the cursor and the first time still in the future
+        due_end = np.searchsorted(self.scheduled_times, self.time, side='right')
+        if self.scheduled_cursor < due_end:
+            self.sync_vehicles()  # The overlap checks read the vehicle positions
+        while self.scheduled_cursor < due_end:
+            vehicle_info = self.scheduled_vehicles[self.scheduled_cursor]
+            self.scheduled_cursor += 1
+            self.deploy_vehicle(vehicle_info)
+
+    def deploy_vehicle(self, vehicle_info):
+        """Place a scheduled vehicle on the road, avoiding overlaps with existing vehicles."""
+        # Find a suitable position
+        position = float(vehicle_info['initial_position'])
+        lane = int(vehicle_info['lane'])
+        desired_velocity = float(vehicle_info['desired_velocity'])
+        
+        # Positions, lanes and clearances of the vehicles and obstacles, gathered once for all attempts
+        n = len(self.vehicles)
+        positions = np.fromiter((v.position for v in self.vehicles), dtype=np.float64, count=n)
+        lanes = np.fromiter((v.lane for v in self.vehicles), dtype=np.int64, count=n)
+        clearances = np.fromiter((max(v.length, 20) for v in self.vehicles), dtype=np.float64, count=n)
+        obstacle_positions = np.array([obstacle['position'] for obstacle in self.obstacles], dtype=np.float64)
+        obstacle_lanes = np.array([obstacle['lane'] for obstacle in self.obstacles], dtype=np.int64)
+        
+        # Check for overlap with existing vehicles
+        overlap = True
+        attempts = 0
+        while overlap and attempts < 5:
+            overlap = False
+            if np.any((lanes == lane) & (np.abs(positions - position) < clearances)):
                 overlap = True
-                attempts = 0
-                while overlap and attempts < 5:
-                    overlap = False
-                    for vehicle in self.vehicles:
-                        if (vehicle.lane == lane and 
-                            abs(vehicle.position - position) < max(vehicle.length, 20)):
-                            overlap = True
-                            position += 25  # Move further down the road
-                            break
-                    
-                    # Check for overlap with obstacles
-                    for obstacle in self.obstacles:
-                        if (obstacle['lane'] == lane and 
-                            abs(obstacle['position'] - position) < 20):
-                            overlap = True
-                            position += 25  # Move further down the road
-                            break
-                    
-                    # If we've reached the end of the road, try a different lane
-                    if position >= self.road_length:
-                        position = 0
-                        lane = (lane + 1) % self.lanes_count
-                    
-                    attempts += 1
-                
-                # If after multiple attempts we still have overlap, skip this vehicle
-                if overlap:
-                    print(f"Warning: Could not deploy vehicle at time {self.time}. Skipping.")
-                    self.scheduled_vehicles.pop(i)
-                    continue
-                
-                # Create new vehicle
-                new_vehicle = Vehicle(
-                    id=len(self.vehicles),
-                    position=position,
-                    velocity=0.7 * vehicle_info['desired_velocity'],
-                    lane=lane,
-                    desired_velocity=vehicle_info['desired_velocity'],
-                    driver_type=vehicle_info['driver_type'],
-                    vis_height=0.2,
-                    vis_width=20,
-                    can_be_distracted=vehicle_info['is_distracted'],
-                )
-
-                new_vehicle.set_driver_parameters()
-                
-                self.vehicles.append(new_vehicle)
-                
-                # Remove from scheduled list
-                self.scheduled_vehicles.pop(i)
-                break  # Only deploy one vehicle per time step to avoid conflicts
+                position += 25  # Move further down the road
+            
+            # Check for overlap with obstacles
+            if np.any((obstacle_lanes == lane) & (np.abs(obstacle_positions - position) < 20)):
+                overlap = True
+                position += 25  # Move further down the road
+            
+            # If we've reached the end of the road, try a different lane
+            if position >= self.road_length:
+                position = 0
+                lane = (lane + 1) % self.lanes_count
+            
+            attempts += 1
+        
+        # If after multiple attempts we still have overlap, skip this vehicle
+        if overlap:
+            print(f"Warning: Could not deploy vehicle at time {self.time}. Skipping.")
+            return
+        
+        # Create new vehicle
+        new_vehicle = Vehicle(
+            id=len(self.vehicles),
+            position=position,
+            velocity=0.7 * desired_velocity,
+            lane=lane,
+            desired_velocity=desired_velocity,
+            driver_type=DriverType(int(vehicle_info['driver_type'])),
+            vis_height=0.2,
+            vis_width=20,
+            can_be_distracted=bool(vehicle_info['is_distracted']),
+        )
+
+        new_vehicle.set_driver_parameters()
+        
+        self.vehicles.append(new_vehicle)
             
     def run_step(self):
         """Run one simulation step."""
@@ -280,28 +311,27 @@ class TrafficSimulation:
         self.deploy_scheduled_vehicle()
         
         # Update all vehicles
-        prev_lanes = {v.id: v.lane for v in self.vehicles}
-        
-        for vehicle in self.vehicles:
-            # Update each vehicle, also passing obstacles information
-            vehicle.update(self.dt, self.vehicles, self.lanes_count, self.road_length, current_time=self.time)
+        if self.use_compiled_kernel:
+            self.lane_changes += self.update_vehicles_compiled()
             
-        # Count lane changes
-        for v in self.vehicles:
-            if prev_lanes[v.id] != v.lane:
-                self.lane_changes += 1
-                
-        # Record statistics
-        if self.vehicles:  # Only calculate if there are vehicles
-            average_speed = sum(v.velocity for v in self.vehicles) / len(self.vehicles)
-            self.average_speeds.append(average_speed)
+            # Record statistics from the kernel arrays (the Vehicle objects are only synced when read)
+            self.record_statistics(self.kernel_velocity, self.kernel_lane)
         else:
-            self.average_speeds.append(0)
-        
-        lane_counts = defaultdict(int)
-        for v in self.vehicles:
-            lane_counts[v.lane] += 1
-        self.lane_distributions.append(dict(lane_counts))
+            self.sync_vehicles()
+            n = len(self.vehicles)
+            prev_lanes = np.fromiter((v.lane for v in self.vehicles), dtype=np.int64, count=n)
+
+            for vehicle in self.vehicles:
+                # Update each vehicle, also passing obstacles information
+                vehicle.update(self.dt, self.vehicles, self.lanes_count, self.road_length, current_time=self.time)
+
+            # Count lane changes
+            lanes = np.fromiter((v.lane for v in self.vehicles), dtype=np.int64, count=n)
+            self.lane_changes += int(np.count_nonzero(lanes != prev_lanes))
+
+            # Record statistics
+            self.record_statistics(np.fromiter((v.velocity for v in self.vehicles), dtype=np.float64, count=n),
+                                   lanes)
         
         self.time += self.dt
         
@@ -309,37 +339,191 @@ class TrafficSimulation:
         # if self.debug:
         #     self.check_simulation_integrity()
             
+    def clear_statistics(self):
+        """Allocate the per-step statistics (one entry per step), starting small and grown as steps are recorded."""
+        capacity = STATISTICS_INITIAL_CAPACITY
+        self.average_speeds = np.zeros(capacity, dtype=np.float64)
+        self.lane_distributions = np.zeros((capacity, self.lanes_count), dtype=np.int32)
+        self.time_axis = np.arange(capacity) * self.dt  # Time of each entry, for plotting
+        self.recorded_steps = 0  # Number of entries of the statistics arrays filled so far
+    
+    def record_statistics(self, velocities, lanes):
+        """Store the average speed and the number of vehicles in each lane for this step.
+        
+        Args:
+            velocities: Velocity of every vehicle (NumPy array)
+            lanes: Lane of every vehicle (NumPy integer array)
+        """
+        if self.recorded_steps == len(self.average_speeds):
+            # Full: double the capacity
+            self.average_speeds = np.concatenate([self.average_speeds, np.zeros_like(self.average_speeds)])
+            self.lane_distributions = np.concatenate([self.lane_distributions, 
+                                                      np.zeros_like(self.lane_distributions)])
+            self.time_axis = np.arange(len(self.average_speeds)) * self.dt
+        
+        self.average_speeds[self.recorded_steps] = velocities.mean() if len(velocities) else 0
+        # Lanes are a dense 0..lanes_count-1 range, so one bincount gives the counts of every lane
+        self.lane_distributions[self.recorded_steps] = np.bincount(lanes, minlength=self.lanes_count)
+        self.recorded_steps += 1
+    
+    def update_kernel_arrays(self):
+        """Gather the vehicles into the kernel arrays, unless they were already built from the current list.
+        
+        Between steps the arrays hold the current state of the vehicles; a new list (reset) or a changed
+        length (deployment) rebuilds them from the Vehicle objects.
+        """
+        vehicles = self.vehicles
+        if self.kernel_vehicles is vehicles and len(self.kernel_position) == len(vehicles):
+            return
+        self.sync_vehicles()
+        
+        self.kernel_params = np.array([
+            (v.length, v.desired_velocity, v.time_headway, v.min_gap, v.max_acceleration, 
+             v.comfortable_deceleration, v.delta, v.politeness, v.changing_threshold, v.safe_deceleration, 
+             v.right_bias, v.obstacle_start_time, v.obstacle_end_time, v.distraction_check_interval, 
+             v.distraction_probability)
+            for v in vehicles
+        ], dtype=np.float64).reshape(len(vehicles), kernels.NUM_PARAMS)
+        self.kernel_is_obstacle = np.array([v.driver_type == DriverType.OBSTACLE for v in vehicles], dtype=np.bool_)
+        self.kernel_can_be_distracted = np.array([v.can_be_distracted for v in vehicles], dtype=np.bool_)
+        
+        self.kernel_position = np.array([v.position for v in vehicles], dtype=np.float64)
+        self.kernel_velocity = np.array([v.velocity for v in vehicles], dtype=np.float64)
+        self.kernel_lane = np.array([v.lane for v in vehicles], dtype=np.int64)
+        # The kernel indexes its per-lane cell lists by lane without bounds checks
+        if len(vehicles) and (self.kernel_lane.min() < 0 or self.kernel_lane.max() >= self.lanes_count):
+            self.kernel_vehicles = None  # Rebuild (and check again) on the next step
+            raise ValueError(f"Vehicle lanes must be between 0 and {self.lanes_count - 1}, "
+                             f"got lanes {self.kernel_lane.min()} to {self.kernel_lane.max()}")
+        self.kernel_acceleration = np.array([v.acceleration for v in vehicles], dtype=np.float64)
+        self.kernel_is_active = np.array([v.is_active for v in vehicles], dtype=np.bool_)
+        self.kernel_is_distracted = np.array([v.is_distracted for v in vehicles], dtype=np.bool_)
+        self.kernel_distraction_start_time = np.array([v.distraction_start_time for v in vehicles], dtype=np.float64)
+        self.kernel_distraction_duration = np.array([v.distraction_duration for v in vehicles], dtype=np.float64)
+        self.kernel_last_distraction_check = np.array([v.last_distraction_check for v in vehicles], dtype=np.float64)
+        self.kernel_vehicles = vehicles
+    
+    def sync_vehicles(self):
+        """Write the kernel arrays back to the Vehicle objects they were built from, if those are behind."""
+        if self.vehicles_synced:
+            return
+        self.vehicles_synced = True
+        
+        for v, v_position, v_velocity, v_lane, v_acceleration, v_active, v_distracted, v_start, v_duration, v_check in zip(
+                self.kernel_vehicles, self.kernel_position.tolist(), self.kernel_velocity.tolist(), 
+                self.kernel_lane.tolist(), self.kernel_acceleration.tolist(), self.kernel_is_active.tolist(), 
+                self.kernel_is_distracted.tolist(), self.kernel_distraction_start_time.tolist(), 
+                self.kernel_distraction_duration.tolist(), self.kernel_last_distraction_check.tolist()):
+            v.position = v_position
+            v.velocity = v_velocity
+            v.lane = v_lane
+            v.acceleration = v_acceleration
+            v.is_active = v_active
+            v.is_distracted = v_distracted
+            v.distraction_start_time = v_start
+            v.distraction_duration = v_duration
+            v.last_distraction_check = v_check
+    
+    def update_vehicles_compiled(self):
+        """Update all vehicles for one step with kernels.step_vehicles and return the number of lane changes.
+        
+        Same sequential update as calling Vehicle.update on each vehicle in turn. The state stays in the
+        kernel arrays from step to step, and is only copied to the Vehicle objects by sync_vehicles.
+        """
+        self.update_kernel_arrays()
+        random_draws = self.rng.random((len(self.vehicles), kernels.NUM_RANDOM_DRAWS))
+        
+        lane_changes = kernels.step_vehicles(
+            float(self.dt), float(self.time), float(self.road_length), int(self.lanes_count), True,
+            self.kernel_position, self.kernel_velocity, self.kernel_lane, self.kernel_acceleration, 
+            self.kernel_is_active, self.kernel_is_distracted, self.kernel_distraction_start_time, 
+            self.kernel_distraction_duration, self.kernel_last_distraction_check,
+            self.kernel_params, self.kernel_is_obstacle, self.kernel_can_be_distracted, random_draws,
+            kernels.cell_count(len(self.vehicles), self.lanes_count, self.road_length)
+        )
+        self.vehicles_synced = False
+        
+        return lane_changes
+            
+    def vehicle_velocities(self):
+        """Current velocity of every vehicle as a NumPy array, read from the kernel arrays when they are current."""
+        if self.use_compiled_kernel and self.kernel_vehicles is self.vehicles and len(self.kernel_velocity) == len(self.vehicles):
+            return self.kernel_velocity
+        self.sync_vehicles()
+        return np.array([v.velocity for v in self.vehicles], dtype=np.float64)
+    
     def check_simulation_integrity(self):
-        """Check for simulation problems like vehicle overlaps."""
+        """Check for simulation problems like vehicle overlaps.
+
+        The vehicles are sorted by lane and position, so each vehicle is only compared with the vehicles
+        just ahead of it in its lane.
+        """
+        self.sync_vehicles()
+        if not self.vehicles:
+            return
+        positions = [v.position for v in self.vehicles]
+        lanes = [v.lane for v in self.vehicles]
+        widths = [v.vis_width for v in self.vehicles]
+        order = np.lexsort((positions, lanes)).tolist()
+        # No two vehicles further apart than this can overlap
+        max_overlap_distance = max(widths) * 0.8
+
         # Check for vehicle-vehicle overlaps
-        for i, v1 in enumerate(self.vehicles):
-            for v2 in self.vehicles[i+1:]:
-                if v1.lane == v2.lane:
-                    distance = abs(v1.position - v2.position)
-                    if distance < (v1.vis_width/2 + v2.vis_width/2) * 0.8:  # 80% of combined widths
-                        print(f"WARNING: Vehicles {v1.id} and {v2.id} overlapping in lane {v1.lane}!")
-                        print(f"  V{v1.id} at {v1.position:.1f}, V{v2.id} at {v2.position:.1f}, Distance: {distance:.1f}")
-        
-            # Check for vehicle-obstacle overlaps
-            for obs in self.obstacles:
-                if v1.lane == obs['lane']:
-                    distance = abs(v1.position - obs['position'])
-                    if distance < (v1.vis_width/2 + obs['width']/2) * 0.8:  # 80% of combined widths
-                        print(f"WARNING: Vehicle {v1.id} overlapping with obstacle at position {obs['position']} in lane {obs['lane']}!")
-                        print(f"  V{v1.id} at {v1.position:.1f}, Obstacle at {obs['position']}, Distance: {distance:.1f}")
+        overlapping_pairs = []
+        for k, i in enumerate(order):
+            for j in order[k+1:]:
+                distance = positions[j] - positions[i]
+                if lanes[j] != lanes[i] or distance >= max_overlap_distance:
+                    break
+                if distance < (widths[i]/2 + widths[j]/2) * 0.8:  # 80% of combined widths
+                    overlapping_pairs.append((min(i, j), max(i, j)))
+
+        # Check for vehicle-obstacle overlaps, with one mask over all vehicles per obstacle
+        position_array = np.array(positions)
+        lane_array = np.array(lanes)
+        half_width_array = np.array(widths) / 2
+        obstacle_overlaps = []
+        for k, obs in enumerate(self.obstacles):
+            overlapping = ((lane_array == obs['lane']) &
+                           (np.abs(position_array - obs['position']) < (half_width_array + obs['width']/2) * 0.8))
+            obstacle_overlaps.extend((i, k) for i in np.flatnonzero(overlapping).tolist())
+
+        # Print the warnings vehicle by vehicle: first its overlaps with the vehicles after it, then with
+        # the obstacles
+        warnings = [(i, 0, j) for i, j in overlapping_pairs] + [(i, 1, k) for i, k in obstacle_overlaps]
+        for i, is_obstacle, other in sorted(warnings):
+            v1 = self.vehicles[i]
+            if is_obstacle:
+                obs = self.obstacles[other]
+                distance = abs(v1.position - obs['position'])
+                print(f"WARNING: Vehicle {v1.id} overlapping with obstacle at position {obs['position']} in lane {obs['lane']}!")
+                print(f"  V{v1.id} at {v1.position:.1f}, Obstacle at {obs['position']}, Distance: {distance:.1f}")
+            else:
+                v2 = self.vehicles[other]
+                distance = abs(v1.position - v2.position)
+                print(f"WARNING: Vehicles {v1.id} and {v2.id} overlapping in lane {v1.lane}!")
+                print(f"  V{v1.id} at {v1.position:.1f}, V{v2.id} at {v2.position:.1f}, Distance: {distance:.1f}")
     
-    def run_without_animation(self, steps=10):
-        """Run simulation for specified steps without animation"""
+    def run_without_animation(self, steps=10, progress_callback=None):
+        """Run simulation for specified steps without animation.
+        
+        Args:
+            steps: Number of simulation steps to run
+            progress_callback: Optional function called as progress_callback(step, steps) after each step
+        """
         if self.to_print:
             print(f"Running {steps} steps without animation...")
             
             for i in range(steps):
                 self.run_step()
+                self.sync_vehicles()
+                if progress_callback is not None:
+                    progress_callback(i + 1, steps)
                 # Print debug info after each step
                 print(f"\nStep {i+1}, Time: {self.time:.1f}")
                 
                 if self.vehicles:
-                    avg_speed = sum(v.velocity for v in self.vehicles) / len(self.vehicles)
+                    avg_speed = float(self.vehicle_velocities().mean())
                     print(f"Average speed: {avg_speed:.1f} m/s ({avg_speed*3.6:.1f} km/h)")
                     print(f"Lane changes so far: {self.lane_changes}")
                 
@@ -356,23 +540,29 @@ class TrafficSimulation:
             
             # Return average speed
             if self.vehicles:
-                avg_speed = sum(v.velocity for v in self.vehicles) / len(self.vehicles)
-                return avg_speed
+                return float(self.vehicle_velocities().mean())
             return -1
         else:
             for i in range(steps):
                 self.run_step()
+                if progress_callback is not None:
+                    progress_callback(i + 1, steps)
             
             print("Non-animated simulation complete")
             
             # Return average speed
             if self.vehicles:
-                avg_speed = sum(v.velocity for v in self.vehicles) / len(self.vehicles)
-                return avg_speed
+                return float(self.vehicle_velocities().mean())
             return -1
             
     def setup_animation(self):
         """Set up the animation."""
+        # matplotlib is imported by the animation methods only, so runs without animation (and the batch
+        # workers) do not load it
+        import matplotlib.pyplot as plt
+        from matplotlib.collections import PolyCollection
+        from matplotlib.widgets import Button
+        
         # Create figure and axis
         fig = plt.figure(figsize=(14, 10))
 
@@ -416,17 +606,18 @@ class TrafficSimulation:
         ax2.set_title('Average Traffic Speed')
         ax2.grid(True)
 
-        # Line for average speed
-        speed_line = ax2.plot([], [], 'r-', lw=2, label='km/h')
+        # Line for average speed (the artists updated every frame are animated, so they are left out of
+        # the blitting background and only drawn by the animation)
+        speed_line = ax2.plot([], [], 'r-', lw=2, label='km/h', animated=True)
         ax2.legend()
 
         # Create a text element for statistics
         stats_text = ax1.text(0.02, 0.95, '', transform=ax1.transAxes, 
-                            fontsize=10, va='top', ha='left')
+                            fontsize=10, va='top', ha='left', animated=True)
         
         # Create a text element for scheduled vehicles info
         scheduled_text = ax1.text(0.98, 0.95, '', transform=ax1.transAxes,
-                                fontsize=10, va='top', ha='right')
+                                fontsize=10, va='top', ha='right', animated=True)
 
         # Create legend for driver types
         legend_elements = [
@@ -449,6 +640,21 @@ class TrafficSimulation:
         # Add keyboard event handler
         fig.canvas.mpl_connect('key_press_event', self.on_key_press)
 
+        # Obstacles never move, so they are drawn once as part of the background
+        for obstacle in self.obstacles:
+            self.draw_obstacle(ax1, obstacle)
+
+        # Artists updated by animate: the car bodies are one collection, and the ID labels are created as
+        # needed and reused from frame to frame
+        self.road_ax = ax1
+        self.speed_line = speed_line[0]
+        self.stats_text = stats_text
+        self.scheduled_text = scheduled_text
+        self.car_bodies = ax1.add_collection(PolyCollection([], edgecolors='black', animated=True))
+        self.car_labels = []
+        self.car_colors = np.empty((0, 4))  # RGBA colour of every vehicle, see animate
+        self.car_colors_vehicles = None  # Vehicle list car_colors was built from
+
         # Return all elements that need to be updated
         return fig, ax1, ax2, speed_line[0], stats_text, scheduled_text
 
@@ -461,7 +667,7 @@ class TrafficSimulation:
             # Pause simulation
             self.is_paused = True
             self.button_pause.label.set_text('Play')
-            plt.draw()
+            self.fig.canvas.draw_idle()
             print("Simulation paused")
         elif event.key == 'l':
             # Step forward once
@@ -475,7 +681,7 @@ class TrafficSimulation:
             # Resume simulation
             self.is_paused = False
             self.button_pause.label.set_text('Pause')
-            plt.draw()
+            self.fig.canvas.draw_idle()
             print("Simulation resumed")
         elif event.key == '0':  # Number zero
             # Reset simulation
@@ -483,16 +689,20 @@ class TrafficSimulation:
             print("Simulation reset")
         elif event.key == 'q':
             # Quit simulation
+            import matplotlib.pyplot as plt
             plt.close(self.fig)
             print("Simulation closed")
         elif event.key == 'x':
             # Fast forward mode toggle
             self.fast_forward = not self.fast_forward
             if self.fast_forward:
-                self.animation_interval = 10  # Much faster
+                # Much faster: shorter frames, each covering several steps so drawing is not the bottleneck
+                self.animation_interval = 10
+                self.steps_per_frame = FAST_FORWARD_STEPS_PER_FRAME
                 print("Fast forward mode enabled")
             else:
                 self.animation_interval = 50  # Back to normal
+                self.steps_per_frame = 1
                 print("Fast forward mode disabled")
             
             # Update animation interval if it exists
@@ -501,6 +711,7 @@ class TrafficSimulation:
     
     def print_drivers_info(self):
         """Print detailed information about all drivers."""
+        self.sync_vehicles()
         print("\n=== DRIVERS INFORMATION ===")
         print(f"Time: {self.time:.1f}s, Total vehicles: {len(self.vehicles)}")
         
@@ -525,48 +736,60 @@ class TrafficSimulation:
     
     def toggle_pause(self, event):
         """Toggle pause/play state."""
+        import matplotlib.animation as animation
+        
         self.is_paused = not self.is_paused
         self.button_pause.label.set_text('Play' if self.is_paused else 'Pause')
-        plt.draw()
+        if isinstance(self.anim, animation.ArtistAnimation):
+            # A recorded playback does not step the simulation, so pause the playback itself
+            if self.is_paused:
+                self.anim.pause()
+            else:
+                self.anim.resume()
+        self.fig.canvas.draw_idle()
     
     def reset_simulation(self, event):
         """Reset the simulation."""
         self.time = 0
         self.lane_changes = 0
-        self.average_speeds = []
-        self.lane_distributions = []
+        self.clear_statistics()
         self.vehicles = []
         self.is_paused = False
         self.fast_forward = False
+        self.steps_per_frame = 1
         
         # Reset original scheduled vehicles
-        self.scheduled_vehicles = list(self.original_scheduled_vehicles)
+        self.set_scheduled_vehicles(self.original_scheduled_vehicles)
         
         if self.n_vehicles > 0:
             self.initialize_vehicles()
-        plt.draw()
-        
-    def draw_car(self, ax, vehicle):
-        """Draw a car with its ID displayed."""
-        x = vehicle.position
-        y = vehicle.lane
-        vis_length = vehicle.vis_width
-        vis_height = vehicle.vis_height
-        
-        # Car body (main rectangle)
-        body = Rectangle(
-            (x - vis_length/2, y - vis_height/2),
-            vis_length, vis_height,
-            angle=0, color=vehicle.color, ec='black'
-        )
-        ax.add_patch(body)
+        if self.fig is not None:
+            self.fig.canvas.draw_idle()
         
-        # Add vehicle ID text
-        ax.text(x, y, str(vehicle.id), ha='center', va='center', 
-                color='white', fontsize=8, fontweight='bold')
+    def car_corners(self):
+        """Corners of every vehicle's rectangle on the road, as an (n_vehicles, 4, 2) array."""
+        n = len(self.vehicles)
+        x = np.fromiter((v.position for v in self.vehicles), dtype=np.float64, count=n)
+        y = np.fromiter((v.lane for v in self.vehicles), dtype=np.float64, count=n)
+        half_length = np.fromiter((v.vis_width / 2 for v in self.vehicles), dtype=np.float64, count=n)
+        half_height = np.fromiter((v.vis_height / 2 for v in self.vehicles), dtype=np.float64, count=n)
+        
+        corners = np.empty((n, 4, 2))
+        corners[:, [0, 3], 0] = (x - half_length)[:, None]
+        corners[:, [1, 2], 0] = (x + half_length)[:, None]
+        corners[:, [0, 1], 1] = (y - half_height)[:, None]
+        corners[:, [2, 3], 1] = (y + half_height)[:, None]
+        return corners
+    
+    def draw_car_label(self, ax):
+        """Create an (empty) vehicle ID label, placed and filled in by animate."""
+        return ax.text(0, 0, '', ha='center', va='center', 
+                       color='white', fontsize=8, fontweight='bold', animated=True)
     
     def draw_obstacle(self, ax, obstacle):
         """Draw an obstacle on the road."""
+        from matplotlib.patches import Rectangle
+        
         x = obstacle['position']
         y = obstacle['lane']
         width = obstacle['width']
@@ -586,86 +809,142 @@ class TrafficSimulation:
         
     def animate(self, frame):
         """Update animation for each frame."""
-        # Run simulation for current frame
-        self.run_step()
-        
-        # Clear previous vehicle patches
-        ax = plt.gcf().axes[0]
-        for patch in ax.patches:
-            patch.remove()
-        
-        # Clear previous texts (except stats text and scheduled text)
-        for txt in ax.texts[2:]:  # Skip the first 2 texts which are stats_text and scheduled_text
-            txt.remove()
+        # Run simulation for current frame (several steps per drawn frame in fast forward mode)
+        for _ in range(self.steps_per_frame):
+            self.run_step()
+        self.sync_vehicles()
+        
+        # All car bodies are drawn by one collection
+        self.car_bodies.set_verts(self.car_corners())
+        # Vehicle colours never change, so they are converted to RGBA once per vehicle list (and again after
+        # a deployment)
+        if self.car_colors_vehicles is not self.vehicles or len(self.car_colors) != len(self.vehicles):
+            from matplotlib.colors import to_rgba_array
+            self.car_colors = to_rgba_array([vehicle.color for vehicle in self.vehicles])
+            self.car_colors_vehicles = self.vehicles
+        self.car_bodies.set_facecolor(self.car_colors)
+        
+        # Move the labels of the previous frame to the vehicles' new state, creating labels only for
+        # vehicles that did not have one yet
+        while len(self.car_labels) < len(self.vehicles):
+            self.car_labels.append(self.draw_car_label(self.road_ax))
+        
+        for vehicle, label in zip(self.vehicles, self.car_labels):
+            label.set_position((vehicle.position, vehicle.lane))
+            label.set_text(str(vehicle.id))
+            label.set_visible(True)
+        
+        # Hide the labels left over from a larger vehicle list (after a reset)
+        for label in self.car_labels[len(self.vehicles):]:
+            label.set_visible(False)
             
-        # Create new car representations
-        for vehicle in self.vehicles:
-            self.draw_car(ax, vehicle)
+        # Update speed plot (the time axis has one entry per recorded average speed)
+        self.speed_line.set_data(self.time_axis[:self.recorded_steps], 
+                                 self.average_speeds[:self.recorded_steps] * 3.6)
         
-        # Draw obstacles
-        for obstacle in self.obstacles:
-            self.draw_obstacle(ax, obstacle)
-            
-        # Update speed plot
-        speed_line = plt.gcf().axes[1].get_lines()[0]
+        # Update statistics text
+        self.stats_text.set_text(self.format_stats_info())
         
-        # Fix: Create time array that matches the length of average_speeds
-        times = np.linspace(0, self.time, len(self.average_speeds))
-        kmh_speeds = [s * 3.6 for s in self.average_speeds]
-        speed_line.set_data(times, kmh_speeds)
+        # Update scheduled vehicles text
+        self.scheduled_text.set_text(self.format_scheduled_info())
         
-        # Update statistics text
-        current_avg_speed = self.average_speeds[-1] if self.average_speeds else 0
-        lane_counts = self.lane_distributions[-1] if self.lane_distributions else {}
+        return ([self.stats_text, self.scheduled_text, self.car_bodies, self.speed_line] +
+                self.car_labels[:len(self.vehicles)])
+    
+    def format_stats_info(self):
+        """Statistics shown in the top left corner of the road."""
+        current_avg_speed = self.average_speeds[self.recorded_steps - 1] if self.recorded_steps else 0
+        lane_counts = self.lane_distributions[self.recorded_steps - 1] if self.recorded_steps else []
         
-        stats_info = (
+        return (
             f"Time: {self.time:.1f}s\n"
             f"Vehicles: {len(self.vehicles)}\n"
             f"Avg Speed: {current_avg_speed:.1f} m/s ({current_avg_speed * 3.6:.1f} km/h)\n"
             f"Lane Changes: {self.lane_changes}\n"
-            f"Vehicles per lane: {', '.join([f'Lane {k+1}: {v}' for k, v in sorted(lane_counts.items())])}"
+            f"Vehicles per lane: {', '.join([f'Lane {k+1}: {v}' for k, v in enumerate(lane_counts)])}"
         )
+    
+    def format_scheduled_info(self):
+        """Next scheduled deployment, shown in the top right corner of the road."""
+        remaining = len(self.scheduled_vehicles) - self.scheduled_cursor
         
-        stats_text = plt.gcf().axes[0].texts[0]
-        stats_text.set_text(stats_info)
-        
-        # Update scheduled vehicles text
-        scheduled_text = plt.gcf().axes[0].texts[1]
-        next_scheduled = sorted(self.scheduled_vehicles, key=lambda x: x['deployment_time'])
-        
-        if next_scheduled:
-            next_vehicle = next_scheduled[0]
-            scheduled_info = (
+        if remaining > 0:
+            next_vehicle = self.scheduled_vehicles[self.scheduled_cursor]
+            return (
                 f"Next vehicle deployment:\n"
                 f"Time: {next_vehicle['deployment_time']}s\n"
                 f"Lane: {next_vehicle['lane'] + 1}\n"
-                f"Scheduled: {len(self.scheduled_vehicles)} remaining"
+                f"Scheduled: {remaining} remaining"
             )
-        else:
-            scheduled_info = "No vehicles scheduled"
+        return "No vehicles scheduled"
+    
+    def record_animation_frames(self, ax1, ax2, frames):
+        """Run the simulation for the given number of frames and build the artists of every frame.
+        
+        Used for recordings, where the whole run is known before playback: the returned lists are
+        played back by an ArtistAnimation, which only toggles their visibility.
+        """
+        from matplotlib.patches import Rectangle
+        from matplotlib.collections import PatchCollection
+        
+        recorded_frames = []
+        for _ in range(frames):
+            self.run_step()
+            self.sync_vehicles()
+            
+            # Vehicles go into one collection per frame (obstacles are part of the background)
+            rects = []
+            frame_artists = []
+            for vehicle in self.vehicles:
+                rects.append(Rectangle(
+                    (vehicle.position - vehicle.vis_width/2, vehicle.lane - vehicle.vis_height/2),
+                    vehicle.vis_width, vehicle.vis_height, color=vehicle.color, ec='black'
+                ))
+                frame_artists.append(ax1.text(vehicle.position, vehicle.lane, str(vehicle.id), ha='center',
+                                              va='center', color='white', fontsize=8, fontweight='bold'))
+            frame_artists.append(ax1.add_collection(PatchCollection(rects, match_original=True)))
+            
+            frame_artists.append(ax1.text(0.02, 0.95, self.format_stats_info(), transform=ax1.transAxes,
+                                          fontsize=10, va='top', ha='left'))
+            frame_artists.append(ax1.text(0.98, 0.95, self.format_scheduled_info(), transform=ax1.transAxes,
+                                          fontsize=10, va='top', ha='right'))
+            
+            frame_artists.extend(ax2.plot(self.time_axis[:self.recorded_steps], 
+                                          self.average_speeds[:self.recorded_steps] * 3.6, 'r-', lw=2))
             
-        scheduled_text.set_text(scheduled_info)
+            recorded_frames.append(frame_artists)
         
-        # First texts are stats_text and scheduled_text, rest are vehicle IDs
-        return [stats_text, scheduled_text] + ax.patches + [speed_line] + ax.texts[2:]
-    
+        return recorded_frames
     
     def run_simulation(self, save_animation=False):
         """Run the full simulation with animation."""
+        import matplotlib.pyplot as plt
+        import matplotlib.animation as animation
+        
         # Store original scheduled vehicles for reset
-        self.original_scheduled_vehicles = list(self.scheduled_vehicles)
+        self.original_scheduled_vehicles = self.scheduled_vehicles.copy()
         
         # Set up the animation
         fig, ax1, ax2, speed_line, stats_text, scheduled_text = self.setup_animation()
         
-        # Create animation
-        self.anim = animation.FuncAnimation(
-            fig, self.animate, 
-            frames=int(self.simulation_time / self.dt),
-            interval=self.animation_interval, 
-            blit=True,
-            cache_frame_data=False  # Fix for animation function
-        )
+        frames = int(self.simulation_time / self.dt)
+        if save_animation:
+            # A recording is deterministic, so simulate it up front and play back the prebuilt frames
+            recorded_frames = self.record_animation_frames(ax1, ax2, frames)
+            self.anim = animation.ArtistAnimation(
+                fig, recorded_frames,
+                interval=self.animation_interval,
+                blit=True
+            )
+        else:
+            # Create animation
+            self.anim = animation.FuncAnimation(
+                fig, self.animate, 
+                frames=frames,
+                interval=self.animation_interval, 
+                blit=True,
+                cache_frame_data=False  # Fix for animation function
+            )
         
         # Save animation if requested
         if save_animation:
@@ -1,10 +1,6 @@
+import math
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.animation as animation
-from matplotlib.patches import Rectangle, Polygon, Circle
-from matplotlib.widgets import Button, Slider, TextBox
 import random
-from collections import defaultdict
 from enum import Enum
 
 class DriverType(Enum):
@@ -15,7 +11,55 @@ class DriverType(Enum):
     SUBMISSIVE = 5
     OBSTACLE = 6  # New driver type for static obstacles
 
+# Record layout of a scheduled vehicle deployment (driver_type holds DriverType.value)
+DEPLOYMENT_DTYPE = np.dtype([
+    ('driver_type', 'i1'),
+    ('lane', 'i2'),
+    ('desired_velocity', 'f8'),
+    ('deployment_time', 'f8'),
+    ('initial_position', 'f8'),
+    ('is_distracted', '?')
+])
+
+# IDM and MOBIL parameters of each driver type, in the order
+# (time_headway, min_gap, max_acceleration, comfortable_deceleration, delta,
+#  politeness, changing_threshold, safe_deceleration, right_bias)
+DRIVER_PARAMETERS = {
+    # Aggressive drivers: short following distance, not polite, will change lanes for any advantage
+    DriverType.AGGRESSIVE: (1.5, 1.5, 2.0, 3.0, 4.0, 0.1, 0.0, 5.0, 0.1),
+    # Normal drivers: average parameters
+    DriverType.NORMAL: (1.5, 2.0, 1.5, 2.0, 4.0, 0.3, 0.1, 4.0, 0.3),
+    # Cautious drivers: long following distance, gentle acceleration, normal politeness
+    DriverType.CAUTIOUS: (2.2, 3.0, 1.2, 1.5, 4.0, 0.3, 0.2, 3.0, 0.4),
+    # Polite drivers: normal following distance, very polite
+    DriverType.POLITE: (1.5, 2.0, 1.5, 2.0, 4.0, 0.7, 0.2, 4.0, 0.4),
+    # Submissive drivers: long following distance, extremely polite, strong bias to the right lane
+    DriverType.SUBMISSIVE: (2.5, 3.5, 1.0, 1.5, 4.0, 0.8, 0.3, 2.5, 0.5),
+    # Obstacle: static vehicle that never accelerates or changes lanes
+    DriverType.OBSTACLE: (0, 0, 0, 0, 0, 0, float('inf'), 0, 0),
+}
+
+# Display color of each driver type
+DRIVER_COLORS = {
+    DriverType.AGGRESSIVE: (0.8, 0.2, 0.2),  # red
+    DriverType.NORMAL: (0.2, 0.6, 0.2),  # green
+    DriverType.CAUTIOUS: (0.2, 0.2, 0.8),  # blue
+    DriverType.POLITE: (0.8, 0.8, 0.2),  # yellow
+    DriverType.SUBMISSIVE: (0.6, 0.2, 0.8),  # purple
+    DriverType.OBSTACLE: (0.0, 0.0, 0.0),  # black
+}
+
 class Vehicle:
+    # Fixed attribute set: smaller objects and faster attribute access in the per-step code
+    __slots__ = (
+        'id', 'position', 'velocity', 'lane', 'desired_velocity', 'length', 'width', 'vis_height', 'vis_width',
+        'acceleration', 'driver_type', 'obstacle_start_time', 'obstacle_end_time', 'is_active',
+        'can_be_distracted', 'is_distracted', 'distraction_start_time', 'distraction_duration',
+        'last_distraction_check', 'distraction_check_interval', 'distraction_probability', 'saved_velocity',
+        'time_headway', 'min_gap', 'max_acceleration', 'comfortable_deceleration', 'delta',
+        'politeness', 'changing_threshold', 'safe_deceleration', 'right_bias', 'braking_interaction_scale', 'color'
+    )
+    
     def __init__(self, id, position, velocity, lane, desired_velocity, driver_type=DriverType.NORMAL, 
                  length=5.0, width=2.0, vis_height=0.5, vis_width=6, color=None,
                  obstacle_start_time=0, obstacle_end_time=float('inf'), can_be_distracted=True):  # Added can_be_distracted parameter
@@ -57,107 +101,19 @@ class Vehicle:
             
     def set_driver_parameters(self):
         """Set IDM and MOBIL parameters based on driver type."""
-        if self.driver_type == DriverType.AGGRESSIVE:
-            # Aggressive drivers: short following distance, not polite
-            self.time_headway = 1.5  # very short desired time headway (s)
-            self.min_gap = 1.5  # minimum gap (m)
-            self.max_acceleration = 2.0  # higher acceleration
-            self.comfortable_deceleration = 3.0  # more aggressive braking
-            self.delta = 4.0  # acceleration exponent
-            
-            # MOBIL parameters
-            self.politeness = 0.1  # very impolite
-            self.changing_threshold = 0.0  # will change lanes for any advantage
-            self.safe_deceleration = 5.0  # higher tolerance for unsafe situations
-            self.right_bias = 0.1  # less bias to right lane
-            
-        elif self.driver_type == DriverType.NORMAL:
-            # Normal drivers: average parameters
-            self.time_headway = 1.5  # desired time headway (s)
-            self.min_gap = 2.0  # minimum gap (m)
-            self.max_acceleration = 1.5  # maximum acceleration (m/s^2)
-            self.comfortable_deceleration = 2.0  # comfortable deceleration (m/s^2)
-            self.delta = 4.0  # acceleration exponent
-            
-            # MOBIL parameters
-            self.politeness = 0.3  # somewhat polite
-            self.changing_threshold = 0.1  # acceleration gain threshold for lane change
-            self.safe_deceleration = 4.0  # maximum safe deceleration
-            self.right_bias = 0.3  # bias towards right lane
-            
-        elif self.driver_type == DriverType.CAUTIOUS:
-            # Cautious drivers: long following distance, normal politeness
-            self.time_headway = 2.2  # longer desired time headway (s)
-            self.min_gap = 3.0  # larger minimum gap (m)
-            self.max_acceleration = 1.2  # gentler acceleration
-            self.comfortable_deceleration = 1.5  # more comfortable braking
-            self.delta = 4.0  # acceleration exponent
-            
-            # MOBIL parameters
-            self.politeness = 0.3  # normal politeness
-            self.changing_threshold = 0.2  # higher threshold for lane changes
-            self.safe_deceleration = 3.0  # lower tolerance for unsafe situations
-            self.right_bias = 0.4  # stronger bias to right lane
-            
-        elif self.driver_type == DriverType.POLITE:
-            # Polite drivers: normal following distance, very polite
-            self.time_headway = 1.5  # desired time headway (s)
-            self.min_gap = 2.0  # minimum gap (m)
-            self.max_acceleration = 1.5  # maximum acceleration (m/s^2)
-            self.comfortable_deceleration = 2.0  # comfortable deceleration (m/s^2)
-            self.delta = 4.0  # acceleration exponent
-            
-            # MOBIL parameters
-            self.politeness = 0.7  # very polite
-            self.changing_threshold = 0.2  # higher threshold for lane changes
-            self.safe_deceleration = 4.0  # maximum safe deceleration
-            self.right_bias = 0.4  # stronger bias to right lane
-            
-        elif self.driver_type == DriverType.SUBMISSIVE:
-            # Submissive drivers: long following distance, very polite
-            self.time_headway = 2.5  # very long desired time headway (s)
-            self.min_gap = 3.5  # large minimum gap (m)
-            self.max_acceleration = 1.0  # gentle acceleration
-            self.comfortable_deceleration = 1.5  # very comfortable braking
-            self.delta = 4.0  # acceleration exponent
-            
-            # MOBIL parameters
-            self.politeness = 0.8  # extremely polite
-            self.changing_threshold = 0.3  # very high threshold for lane changes
-            self.safe_deceleration = 2.5  # very low tolerance for unsafe situations
-            self.right_bias = 0.5  # very strong bias to right lane
-            
-        elif self.driver_type == DriverType.OBSTACLE:
-            # Obstacle: static vehicle, doesn't move
-            self.time_headway = 0  # Not used for obstacles
-            self.min_gap = 0  # Not used for obstacles
-            self.max_acceleration = 0  # No acceleration
-            self.comfortable_deceleration = 0  # No deceleration
-            self.delta = 0  # Not used for obstacles
-            
-            # MOBIL parameters - obstacles don't change lanes
-            self.politeness = 0  # Not used for obstacles
-            self.changing_threshold = float('inf')  # Never change lanes
-            self.safe_deceleration = 0  # Not used for obstacles
-            self.right_bias = 0  # Not used for obstacles
-        
-        else: 
+        try:
+            (self.time_headway, self.min_gap, self.max_acceleration, self.comfortable_deceleration, self.delta,
+             self.politeness, self.changing_threshold, self.safe_deceleration,
+             self.right_bias) = DRIVER_PARAMETERS[self.driver_type]
+        except KeyError:
             raise ValueError("Invalid driver type")
+        
+        # Denominator of the velocity difference term of the IDM desired gap (constant per driver type)
+        self.braking_interaction_scale = 2 * math.sqrt(self.max_acceleration * self.comfortable_deceleration)
     
     def get_driver_color(self):
         """Return color based on driver type."""
-        if self.driver_type == DriverType.AGGRESSIVE:
-            return (0.8, 0.2, 0.2)  # red
-        elif self.driver_type == DriverType.NORMAL:
-            return (0.2, 0.6, 0.2)  # green
-        elif self.driver_type == DriverType.CAUTIOUS:
-            return (0.2, 0.2, 0.8)  # blue
-        elif self.driver_type == DriverType.POLITE:
-            return (0.8, 0.8, 0.2)  # yellow
-        elif self.driver_type == DriverType.SUBMISSIVE:
-            return (0.6, 0.2, 0.8)  # purple
-        elif self.driver_type == DriverType.OBSTACLE:
-            return (0.0, 0.0, 0.0)  # black
+        return DRIVER_COLORS.get(self.driver_type)
     
     def idm_acceleration(self, lead_vehicle=None, road_length=1000):
         """Calculate acceleration based on IDM model."""
@@ -174,22 +130,19 @@ class Vehicle:
         # Calculate gap and velocity difference
         gap = lead_vehicle.position - self.position - lead_vehicle.length
         
-        # Handle circular boundary
-        if gap < -lead_vehicle.length / 2:
-            gap += road_length
-        elif gap < 0:
-            # gap = 0.1
+        # Handle circular boundary (a leader behind us is ahead on the next lap)
+        if gap < 0:
             gap += road_length
             
         delta_v = self.velocity - lead_vehicle.velocity
         
-        # Calculate desired gap
-        s_star = self.min_gap + max(0, self.velocity * self.time_headway + 
-                                   (self.velocity * delta_v) / 
-                                   (2 * np.sqrt(self.max_acceleration * self.comfortable_deceleration)))
+        # Calculate desired gap (inline comparisons instead of max(): this runs several times per vehicle
+        # and step on the object path)
+        dynamic_gap = self.velocity * self.time_headway + (self.velocity * delta_v) / self.braking_interaction_scale
+        s_star = self.min_gap + (dynamic_gap if dynamic_gap > 0 else 0.0)
         
         # Calculate interaction deceleration
-        a_int = -self.max_acceleration * (s_star / max(gap, 0.1)) ** 2
+        a_int = -self.max_acceleration * (s_star / (gap if gap > 0.1 else 0.1)) ** 2
         
         # Combine free and interaction accelerations
         return a_free + a_int
@@ -291,18 +244,9 @@ class Vehicle:
                 
         # Check safety with respect to new follower
         if follow_target:
-            # Calculate acceleration of follower if we change lanes
-            self_clone = Vehicle(
-                id=-1,
-                position=self.position,
-                velocity=self.velocity,
-                lane=follow_target.lane,
-                desired_velocity=self.desired_velocity,
-                length=self.length,
-                driver_type=self.driver_type
-            )
-            
-            new_follower_acc = follow_target.idm_acceleration(lead_vehicle=self_clone)
+            # Calculate acceleration of follower if we change lanes (the lane plays no part in IDM, so
+            # this vehicle itself stands for its copy in the target lane)
+            new_follower_acc = follow_target.idm_acceleration(lead_vehicle=self)
             
             if new_follower_acc < -self.safe_deceleration:
                 return False
@@ -312,18 +256,9 @@ class Vehicle:
     def calculate_lane_change_advantage(self, current_acc, lead_current, follow_current, 
                                        lead_target, follow_target, target_lane, road_length):
         """Calculate the advantage of changing to the target lane."""
-        # Calculate acceleration in new lane
-        self_clone = Vehicle(
-            id=-1,
-            position=self.position,
-            velocity=self.velocity,
-            lane=target_lane,
-            desired_velocity=self.desired_velocity,
-            length=self.length,
-            driver_type=self.driver_type
-        )
-        
-        new_acc = self_clone.idm_acceleration(lead_vehicle=lead_target)
+        # Calculate acceleration in new lane (the lane plays no part in IDM, so this vehicle stands for
+        # its copy in the target lane)
+        new_acc = self.idm_acceleration(lead_vehicle=lead_target)
         acc_gain = new_acc - current_acc
         
         # Calculate disadvantage to the new follower
@@ -333,7 +268,7 @@ class Vehicle:
             old_follower_acc = follow_target.idm_acceleration(lead_vehicle=lead_target)
             
             # Follower acceleration after lane change
-            new_follower_acc = follow_target.idm_acceleration(lead_vehicle=self_clone)
+            new_follower_acc = follow_target.idm_acceleration(lead_vehicle=self)
             
             disadvantage_follower = old_follower_acc - new_follower_acc
             
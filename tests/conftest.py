@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The simulator modules import each other by plain module name, as when running src/main.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
@@ -0,0 +1,20 @@
+import pandas as pd
+import pytest
+
+import batchRunner
+
+
+@pytest.mark.parametrize('engine', ['xlsxwriter', 'openpyxl'])
+def test_save_results_round_trip(tmp_path, monkeypatch, engine):
+    """Both sheets read back exactly as written, with the preferred engine and with the fallback."""
+    pytest.importorskip(engine)
+    if batchRunner.EXCEL_WRITER_OPTIONS['engine'] != engine:
+        monkeypatch.setattr(batchRunner, 'EXCEL_WRITER_OPTIONS', {'engine': engine})
+    df_detailed = pd.DataFrame({'a': [1, 2, 3], 'b': [4.5, 5.5, 6.5], 'c': ['x', 'y', 'z']})
+    df_summary = pd.DataFrame({'Number of Vehicles': [10, 20], 'Average Speed': [12.5, 8.25]})
+
+    excel_filename = batchRunner.save_results(df_detailed, df_summary, str(tmp_path))
+
+    sheets = pd.read_excel(excel_filename, sheet_name=None)
+    pd.testing.assert_frame_equal(sheets['Detailed Results'], df_detailed)
+    pd.testing.assert_frame_equal(sheets['Summary Results'], df_summary)
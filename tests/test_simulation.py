@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from trafficSimulation import TrafficSimulation
+from vehicle import Vehicle, DriverType, DEPLOYMENT_DTYPE
+
+
+def make_simulation():
+    """Enough vehicles on two lanes for the compiled update to use its per-lane cell lists."""
+    return TrafficSimulation(road_length=1000, lanes_count=2, n_vehicles=200, seed=1)
+
+
+def test_scheduled_vehicle_outside_lanes_is_rejected():
+    simulation = make_simulation()
+    deployments = np.zeros(1, dtype=DEPLOYMENT_DTYPE)
+    deployments[0] = (DriverType.NORMAL.value, 2, 25.0, 0.0, 500.0, False)
+
+    with pytest.raises(ValueError, match='lanes'):
+        simulation.set_scheduled_vehicles(deployments)
+
+
+def test_vehicle_outside_lanes_is_rejected_before_the_update():
+    simulation = make_simulation()
+    simulation.vehicles.append(Vehicle(id=200, position=500.0, velocity=10.0, lane=2, desired_velocity=20.0,
+                                       driver_type=DriverType.NORMAL))
+
+    for _ in range(3):
+        with pytest.raises(ValueError, match='lanes'):
+            simulation.run_step()